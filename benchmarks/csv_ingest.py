@@ -0,0 +1,67 @@
+"""Micro-benchmark: parser CSV línea a línea frente a la lectura en bloque.
+
+Uso (desde la raíz del repo)::
+
+    python benchmarks/csv_ingest.py
+
+Parsea todos los CSV de ``data/`` con el parser anterior (``pd.to_datetime`` y
+``pd.to_numeric`` por línea) y con ``taa.store.read_price_csv``, comprueba que
+las series coinciden y muestra los tiempos.
+"""
+import glob
+import os
+import sys
+import time
+
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from taa.store import DATA_DIR, read_price_csv  # noqa: E402
+
+
+def legacy_parse(csv_content, ticker):
+    """Parser original de ``load_historical_data_from_csv``"""
+    lines = csv_content.strip().split('\n')
+    dates = []
+    close_prices = []
+    for line in lines[3:]:
+        if line.strip():
+            parts = line.split(',')
+            if len(parts) >= 2:
+                try:
+                    date = pd.to_datetime(parts[0])
+                    close_price = pd.to_numeric(parts[1], errors='coerce')
+                    dates.append(date)
+                    close_prices.append(close_price)
+                except Exception:
+                    continue
+    df = pd.DataFrame({ticker: close_prices}, index=dates)
+    df.index = pd.to_datetime(df.index)
+    return df
+
+
+def run(parse, texts):
+    start = time.perf_counter()
+    out = {ticker: parse(text, ticker) for ticker, text in texts.items()}
+    return out, time.perf_counter() - start
+
+
+def main():
+    texts = {}
+    for path in sorted(glob.glob(os.path.join(DATA_DIR, "*.csv"))):
+        with open(path, encoding="utf-8") as f:
+            texts[os.path.basename(path)[:-4]] = f.read()
+    rows = sum(text.count("\n") for text in texts.values())
+    print(f"{len(texts)} CSV, {rows} líneas")
+
+    new, t_new = run(read_price_csv, texts)
+    old, t_old = run(legacy_parse, texts)
+    same = all(new[t].equals(old[t]) for t in texts)
+    print(f"línea a línea: {t_old:8.3f} s")
+    print(f"en bloque:     {t_new:8.3f} s  ({t_old / t_new:.0f}x)")
+    print(f"series idénticas: {same}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1 @@
+"""Núcleo de cálculo del TAA Dashboard."""
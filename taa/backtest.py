@@ -0,0 +1,181 @@
+"""Backtest de una selección de estrategias sobre un panel de precios mensuales.
+
+Es el cálculo que hace el dashboard al pulsar «Ejecutar»: una pasada por
+estrategia sobre el panel extendido (con la historia del calentamiento), la
+señal real e hipotética, las curvas de equity dentro del rango del usuario,
+el benchmark SPY y las métricas. No depende de Streamlit, así que lo pueden
+usar igual scripts, workers y pruebas.
+"""
+from datetime import timedelta
+
+import pandas as pd
+
+from taa.features import FeatureStore
+from taa.metrics import EMPTY_METRICS, calc_metrics
+from taa.portfolio import equity_curves
+from taa.signals import SignalHistory, SignalMatrix
+from taa.strategies import STRATEGY_REGISTRY, run_strategy, shift_decisions
+
+
+class BacktestError(ValueError):
+    """No hay datos suficientes para el backtest; el mensaje es apto para el usuario"""
+
+
+def real_signal_cutoff(last_data_date):
+    """Último día del mes ANTERIOR al último dato disponible (la señal real usa datos hasta aquí)"""
+    return (last_data_date.replace(day=1) - timedelta(days=1)).replace(day=1) + pd.offsets.MonthEnd(0)
+
+
+def _metrics(rets, messages):
+    try:
+        return calc_metrics(rets)
+    except Exception as e:
+        messages.append(("error", f"Error calculando métricas: {e}"))
+        return dict(EMPTY_METRICS)
+
+
+def _combine(signals, active):
+    """Señal de la cartera combinada: cada estrategia pesa ``1 / len(active)``"""
+    combined = {}
+    for s in active:
+        for t, w in signals.get(s, {}).items():
+            combined[t] = combined.get(t, 0) + w / len(active)
+    return combined
+
+
+def run_signals(df, active, start, end, decisions=None, features=None, pool=None):
+    """Señales de cada estrategia activa sobre el panel extendido ``df``.
+
+    ``decisions`` permite pasar decisiones ya calculadas por estrategia (por
+    ejemplo, del snapshot); las que falten se calculan aquí, repartidas entre
+    procesos si se pasa un :class:`~taa.parallel.StrategyPool`. Devuelve
+    ``{"last", "current", "log", "history", "messages"}``: la señal real
+    (datos hasta el cierre del mes anterior), la hipotética (todos los datos),
+    el log de señales (``{"real", "hypothetical"}`` como :class:`SignalMatrix`
+    sobre los tickers de la estrategia) y el historial del backtest dentro de
+    ``[start, end]``.
+    """
+    if df is None or df.empty:
+        raise BacktestError("❌ No hay datos suficientes para calcular señales.")
+    cutoff = real_signal_cutoff(df.index.max())
+    # Matrices ROC/SMA compartidas por todas las estrategias de esta ejecución
+    features = features if features is not None else FeatureStore()
+    start, end = pd.Timestamp(start), pd.Timestamp(end)
+    out = {"last": {}, "current": {}, "log": {}, "history": {}, "messages": [], "cutoff": cutoff}
+    computed, failed = dict(decisions or {}), {}
+    if pool is not None:
+        missing = [s for s in active if s not in computed]
+        for name, result, error in pool.imap(missing, df, features):
+            if error is None:
+                computed[name] = result
+            else:
+                failed[name] = error
+    # Una única pasada por estrategia sobre el marco extendido: las señales son
+    # causales, así que la real, la hipotética y el backtest son cortes del mismo resultado
+    for s in active:
+        tickers = pd.Index([t for t in STRATEGY_REGISTRY[s]["tickers"] if t in df.columns])
+        try:
+            if s in failed:
+                raise failed[s]
+            if s in computed:
+                strategy_decisions = computed[s]
+            else:
+                strategy_decisions = run_strategy(s, df, features)
+            # Cada decisión se aplica en el periodo siguiente (o en el mismo, según la estrategia)
+            history = shift_decisions(strategy_decisions, df.index, STRATEGY_REGISTRY[s]["lag"])
+            real_decisions = [sig for sig in strategy_decisions if sig[0] <= cutoff]
+            out["last"][s] = real_decisions[-1][1] if real_decisions else {}
+            out["current"][s] = strategy_decisions[-1][1] if strategy_decisions else {}
+            out["log"][s] = {
+                "real": SignalMatrix.from_signals(
+                    ([sig for sig in history if sig[0] < real_decisions[-1][0]] + real_decisions[-1:])
+                    if real_decisions else [], tickers),
+                # Del log hipotético solo se muestra la última
+                "hypothetical": SignalMatrix.from_signals(strategy_decisions[-1:], tickers),
+            }
+            out["history"][s] = SignalHistory(history).between(start, end)
+        except Exception as e:
+            out["messages"].append(("error", f"Error calculando señales para {s}: {e}"))
+            out["last"][s] = {}
+            out["current"][s] = {}
+            out["log"][s] = {"real": SignalMatrix.from_signals([], tickers),
+                             "hypothetical": SignalMatrix.from_signals([], tickers)}
+            out["history"][s] = SignalHistory()
+    return out
+
+
+def spy_benchmark(prices, index, initial_capital):
+    """Curva de SPY con el mismo capital, alineada con ``index`` (plana si no hay SPY)"""
+    if "SPY" in prices.columns:
+        spy_prices = prices["SPY"]
+        if len(spy_prices) > 0 and spy_prices.iloc[0] > 0 and not pd.isna(spy_prices.iloc[0]):
+            spy_series = spy_prices / spy_prices.iloc[0] * initial_capital
+            return spy_series.reindex(index, method='pad').bfill()
+    return pd.Series([initial_capital] * len(index), index=index)
+
+
+def run_backtest(df, active, start, end, initial_capital, decisions=None, features=None, pool=None):
+    """Backtest completo de ``active`` entre ``start`` y ``end`` sobre el panel extendido ``df``.
+
+    Devuelve un dict con las señales (``signals``: ver :func:`run_signals`),
+    la combinada real e hipotética, las curvas (``combined``, ``spy``,
+    ``series``), las métricas (``metrics``: ``combined``, ``spy`` y
+    ``strategies``) y los avisos no fatales (``messages``); ``decisions``,
+    ``features`` y ``pool`` se pasan a :func:`run_signals`. Lanza
+    :class:`BacktestError` si no hay datos suficientes.
+    """
+    if not active:
+        raise BacktestError("Selecciona al menos una estrategia")
+    signals = run_signals(df, active, start, end, decisions, features, pool)
+    messages = signals["messages"]
+    start, end = pd.Timestamp(start), pd.Timestamp(end)
+    # Filtrar al rango de fechas del usuario
+    df_filtered = df[(df.index >= start) & (df.index <= end)]
+    if df_filtered.empty:
+        raise BacktestError("❌ No hay datos en el rango de fechas seleccionado.")
+    # El calentamiento de las señales sale del marco extendido, así que el
+    # backtest arranca en la fecha de inicio elegida
+    if len(df_filtered) < 2:
+        raise BacktestError("❌ No hay suficientes datos en el rango filtrado.")
+    strategy_signals = signals["history"]
+    if not strategy_signals.get(active[0]):
+        raise BacktestError("❌ No se pudieron calcular fechas de rebalanceo.")
+
+    df_returns = df_filtered.pct_change().fillna(0)
+    # Curvas de equity (combinada e individuales en una sola pasada)
+    comb_series, raw_ind_series = equity_curves(df_returns, strategy_signals, active, initial_capital)
+    spy_series = spy_benchmark(df_filtered, comb_series.index, initial_capital)
+
+    ind_series, ind_metrics = {}, {}
+    flat = pd.Series([initial_capital] * len(comb_series), index=comb_series.index)
+    for s in active:
+        try:
+            if not strategy_signals.get(s):
+                messages.append(("warning", f"No hay fechas de rebalanceo para {s}"))
+                ind_series[s] = flat.copy()
+                ind_metrics[s] = dict(EMPTY_METRICS)
+                continue
+            ser = raw_ind_series[s].reindex(comb_series.index, method='pad').bfill()
+            ind_series[s] = ser
+            ind_metrics[s] = _metrics(ser.pct_change().dropna(), messages)
+        except Exception as e:
+            messages.append(("error", f"Error calculando serie para {s}: {e}"))
+            ind_series[s] = flat.copy()
+            ind_metrics[s] = dict(EMPTY_METRICS)
+
+    return {
+        "active": list(active),
+        "prices": df,
+        "signals": signals,
+        "combined_last": _combine(signals["last"], active),
+        "combined_current": _combine(signals["current"], active),
+        "combined": comb_series,
+        "spy": spy_series,
+        "series": ind_series,
+        "metrics": {
+            "combined": _metrics(comb_series.pct_change().dropna(), messages),
+            "spy": _metrics(spy_series.pct_change().dropna(), messages),
+            "strategies": ind_metrics,
+        },
+        "messages": messages,
+    }
@@ -0,0 +1,246 @@
+"""Backtests por lotes desde la línea de comandos (cron, CI) sin navegador.
+
+Ejecuta la misma lógica de señales y equity que el dashboard para una o
+varias configuraciones y guarda los resultados en ``--out``:
+
+* ``equity.parquet``: curvas de equity (run, serie, fecha, valor), con la
+  combinada, SPY y cada estrategia;
+* ``signals.parquet``: log de señales real e hipotético (run, estrategia,
+  tipo, fecha, ticker, peso);
+* ``metrics.json``: configuración, métricas de ``calc_metrics``, señales
+  actuales y avisos de cada run.
+
+Ejemplos::
+
+    python -m taa.batch --strategies "DAA KELLER" --start 2015-01-01 --out resultados/
+    python -m taa.batch --strategies "DAA KELLER,HAA" --strategies "VAA-12" \\
+        --start 2010-01-01 --start 2015-01-01 --capital 100000 --workers 4 --out resultados/
+    python -m taa.batch --config runs.json --out resultados/
+
+Los flags repetidos se combinan en una rejilla (producto cartesiano);
+``runs.json`` es una lista de objetos con ``strategies``, ``start``, ``end``,
+``capital`` y opcionalmente ``name``. Los precios se cargan una sola vez por
+fecha final efectiva y cada run recorta ese panel; los workers reciben los
+paneles al arrancar, no en cada tarea.
+"""
+import argparse
+import itertools
+import json
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor
+
+import pandas as pd
+
+from taa import config
+from taa.backtest import BacktestError, run_backtest
+from taa.data import LoadReport, PriceLoader, clean_and_align
+from taa.features import FeatureStore
+from taa.store import DATA_DIR
+from taa.strategies import STRATEGY_REGISTRY, history_start, strategy_tickers
+
+# Días de margen tras la fecha final, como en el dashboard
+END_MARGIN = pd.Timedelta(days=30)
+
+# Estado de cada worker: paneles compartidos y matrices ROC/SMA reutilizables
+_PANELS = {}
+_FEATURES = None
+
+
+def expand_runs(strategies, starts, ends, capitals):
+    """Rejilla de configuraciones; cada elemento de ``strategies`` es una lista de nombres"""
+    runs = []
+    for names, start, end, capital in itertools.product(strategies, starts, ends, capitals):
+        runs.append({"strategies": list(names), "start": start, "end": end, "capital": capital})
+    return runs
+
+
+def load_runs(path):
+    """Configuraciones de un fichero JSON (lista de objetos)"""
+    with open(path, encoding="utf-8") as f:
+        runs = json.load(f)
+    if not isinstance(runs, list):
+        raise ValueError(f"{path}: se esperaba una lista de configuraciones")
+    return runs
+
+
+def normalize_run(run, index, today):
+    """Completa y valida una configuración: fechas como Timestamp, nombre y capital.
+
+    ``data_end`` es el último día que descargaría el dashboard para ella
+    (fin + margen, como mucho hoy); los runs con el mismo comparten panel.
+    """
+    names = run.get("strategies") or []
+    if isinstance(names, str):
+        names = [n.strip() for n in names.split(",") if n.strip()]
+    unknown = [n for n in names if n not in STRATEGY_REGISTRY]
+    if unknown:
+        raise ValueError(f"Estrategias desconocidas: {', '.join(unknown)}")
+    if not names:
+        raise ValueError("Cada configuración necesita al menos una estrategia")
+    end = run.get("end") or "today"
+    end = today if end == "today" else pd.Timestamp(end)
+    start = pd.Timestamp(run.get("start", "2015-01-01"))
+    capital = float(run.get("capital", 100_000))
+    name = run.get("name") or f"run{index:03d}"
+    return {"name": name, "strategies": names, "start": start, "end": end, "capital": capital,
+            "data_end": min(end + END_MARGIN, today)}
+
+
+def load_panels(loader, runs, report):
+    """Un panel mensual por ``data_end``, con todos los tickers y la historia que piden sus runs"""
+    groups = {}
+    for run in runs:
+        groups.setdefault(run["data_end"], []).append(run)
+    panels = {}
+    for end, group in groups.items():
+        tickers = list(dict.fromkeys(t for run in group for t in strategy_tickers(run["strategies"])))
+        start = min(history_start(run["start"], run["strategies"]) for run in group)
+        raw = loader.load(tickers, start, end, report)
+        panels[end] = clean_and_align(raw, report) if raw else pd.DataFrame()
+    return panels
+
+
+def run_prices(panel, run):
+    """Recorte del panel compartido igual al que montaría una descarga solo para ``run``"""
+    if panel.empty:
+        return panel
+    tickers = [t for t in strategy_tickers(run["strategies"]) if t in panel.columns]
+    start = history_start(run["start"], run["strategies"])
+    return panel.loc[panel.index >= start, tickers]
+
+
+def _init_worker(panels):
+    global _PANELS, _FEATURES
+    _PANELS = panels
+    _FEATURES = FeatureStore()
+
+
+def _execute(run):
+    """Ejecuta un run en el worker con su panel ya cargado"""
+    prices = run_prices(_PANELS[run["data_end"]], run)
+    try:
+        result = run_backtest(prices, run["strategies"], run["start"], run["end"], run["capital"],
+                              features=_FEATURES)
+    except BacktestError as e:
+        return {"run": run, "error": str(e)}
+    return {"run": run, "error": None, "result": _portable(result)}
+
+
+def _portable(result):
+    """Solo lo que se guarda: curvas, log de señales, métricas y avisos"""
+    curves = {"Combinada": result["combined"], "SPY": result["spy"], **result["series"]}
+    return {
+        "curves": curves,
+        "log": result["signals"]["log"],
+        "last": result["signals"]["last"],
+        "current": result["signals"]["current"],
+        "combined_last": result["combined_last"],
+        "combined_current": result["combined_current"],
+        "metrics": result["metrics"],
+        "messages": result["messages"],
+    }
+
+
+def run_batch(runs, panels, workers=1):
+    """Ejecuta ``runs`` (ya normalizados) sobre ``panels`` y devuelve sus resultados en orden"""
+    if workers <= 1 or len(runs) <= 1:
+        _init_worker(panels)
+        return [_execute(run) for run in runs]
+    with ProcessPoolExecutor(max_workers=min(workers, len(runs)), initializer=_init_worker,
+                             initargs=(panels,)) as pool:
+        return list(pool.map(_execute, runs))
+
+
+def write_results(results, out):
+    """Escribe ``equity.parquet``, ``signals.parquet`` y ``metrics.json`` en ``out``"""
+    os.makedirs(out, exist_ok=True)
+    equity, signals, summary = [], [], []
+    for item in results:
+        run = item["run"]
+        entry = {
+            "run": run["name"],
+            "strategies": run["strategies"],
+            "start": f"{run['start']:%Y-%m-%d}",
+            "end": f"{run['end']:%Y-%m-%d}",
+            "capital": run["capital"],
+            "error": item["error"],
+        }
+        result = item.get("result")
+        if result is not None:
+            for series_name, ser in result["curves"].items():
+                equity.append(pd.DataFrame({"run": run["name"], "series": series_name,
+                                            "date": ser.index, "value": ser.to_numpy(dtype=float)}))
+            for strategy, log in result["log"].items():
+                for kind in ("real", "hypothetical"):
+                    signals.append(log[kind].to_frame().assign(run=run["name"], strategy=strategy, kind=kind))
+            metrics = result["metrics"]
+            entry.update({
+                "metrics": {"Combinada": metrics["combined"], "SPY": metrics["spy"], **metrics["strategies"]},
+                "signal_real": {"Combinada": result["combined_last"], **result["last"]},
+                "signal_hypothetical": {"Combinada": result["combined_current"], **result["current"]},
+                "messages": [{"level": level, "text": text} for level, text in result["messages"]],
+            })
+        summary.append(entry)
+
+    equity = (pd.concat(equity, ignore_index=True) if equity
+              else pd.DataFrame(columns=["run", "series", "date", "value"]))
+    equity.to_parquet(os.path.join(out, "equity.parquet"), compression="zstd", index=False)
+    columns = ["run", "strategy", "kind", "date", "ticker", "weight"]
+    signals = pd.concat(signals, ignore_index=True)[columns] if signals else pd.DataFrame(columns=columns)
+    signals.to_parquet(os.path.join(out, "signals.parquet"), compression="zstd", index=False)
+    with open(os.path.join(out, "metrics.json"), "w", encoding="utf-8") as f:
+        json.dump(summary, f, ensure_ascii=False, indent=1, default=float)
+    return summary
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Backtests TAA por lotes con salida Parquet/JSON")
+    parser.add_argument("--strategies", action="append",
+                        help="estrategias separadas por comas (repetible: una combinación por flag)")
+    parser.add_argument("--start", action="append", help="fecha de inicio (repetible)")
+    parser.add_argument("--end", action="append", help="fecha de fin o 'today' (repetible)")
+    parser.add_argument("--capital", action="append", type=float, help="capital inicial (repetible)")
+    parser.add_argument("--config", help="JSON con una lista de configuraciones")
+    parser.add_argument("--out", required=True, help="directorio de salida")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--data-dir", default=DATA_DIR)
+    parser.add_argument("--cache-dir", default=config.CACHE_DIR)
+    parser.add_argument("--no-fmp", action="store_true", help="usar solo los datos locales")
+    args = parser.parse_args(argv)
+
+    runs = load_runs(args.config) if args.config else []
+    if args.strategies:
+        runs += expand_runs([s.split(",") for s in args.strategies], args.start or ["2015-01-01"],
+                            args.end or ["today"], args.capital or [100_000])
+    if not runs:
+        parser.error("indica --strategies o --config")
+
+    loader = PriceLoader(cache_dir=args.cache_dir, data_dir=args.data_dir,
+                         fmp_keys=[] if args.no_fmp else config.FMP_KEYS)
+    today = loader.today()
+    try:
+        runs = [normalize_run(run, i, today) for i, run in enumerate(runs)]
+    except ValueError as e:
+        parser.error(str(e))
+
+    report = LoadReport()
+    panels = load_panels(loader, runs, report)
+    for level, text in report.messages:
+        print(f"[{level}] {text}", file=sys.stderr)
+    results = run_batch(runs, panels, args.workers)
+    summary = write_results(results, args.out)
+
+    for entry in summary:
+        if entry["error"]:
+            print(f"{entry['run']}: {entry['error']}")
+        else:
+            m = entry["metrics"]["Combinada"]
+            print(f"{entry['run']}: {', '.join(entry['strategies'])} · CAGR {m['CAGR']} % · "
+                  f"MaxDD {m['MaxDD']} % · Sharpe {m['Sharpe']}")
+    print(f"📁 Resultados en {args.out}")
+    return 1 if all(entry["error"] for entry in summary) else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,268 @@
+"""Caché en disco de precios diarios por ticker y rango de fechas.
+
+Cada ticker guarda sus filas diarias y el rango ``[inicio, fin]`` que ya se ha
+pedido. Cualquier sub-rango se sirve recortando esas filas; si una petición
+se sale por algún extremo, solo hay que descargar el trozo que falta y el
+rango cubierto se amplía.
+
+Los ficheros los gestiona :class:`DiskCache`: escritura atómica (temporal +
+rename), bloqueo entre procesos, presupuesto de bytes con expulsión LRU y
+estadísticas de aciertos y fallos.
+"""
+import os
+import pickle
+import re
+import tempfile
+import threading
+import time
+from contextlib import contextmanager
+
+import pandas as pd
+
+from taa.trading_calendar import next_data_ready
+
+try:
+    import fcntl
+except ImportError:  # Windows: solo bloqueo entre hilos
+    fcntl = None
+
+_DAY = pd.Timedelta(days=1)
+# Pickles de la caché anterior: md5(ticker_inicio_fin).pkl en la raíz de cache/
+_LEGACY_FILE = re.compile(r"^[0-9a-f]{32}\.pkl$")
+
+
+def purge_legacy(directory):
+    """Borra los pickles md5 de la caché anterior en ``directory``; devuelve cuántos.
+
+    Guardaban precios mensuales por rango exacto y la caché por intervalos no
+    los puede aprovechar; fuera de su subdirectorio, el presupuesto de bytes
+    tampoco los vería nunca.
+    """
+    removed = 0
+    try:
+        names = os.listdir(directory)
+    except FileNotFoundError:
+        return 0
+    for name in names:
+        if _LEGACY_FILE.match(name):
+            try:
+                os.remove(os.path.join(directory, name))
+                removed += 1
+            except FileNotFoundError:
+                pass
+    return removed
+
+
+class DiskCache:
+    """Pickles en disco con presupuesto de bytes y expulsión LRU.
+
+    El orden LRU es la fecha de modificación de cada fichero, que se renueva
+    en cada lectura. Los ficheros ilegibles se borran y cuentan como fallo.
+    """
+
+    SUFFIX = ".pkl"
+
+    def __init__(self, directory, max_bytes=256 * 1024 ** 2):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.stats = {"hits": 0, "misses": 0, "evictions": 0, "errors": 0}
+        self._local = threading.local()
+        self._thread_lock = threading.Lock()
+        os.makedirs(directory, exist_ok=True)
+
+    def _path(self, key):
+        return os.path.join(self.directory, f"{key}{self.SUFFIX}")
+
+    def _count(self, stat):
+        with self._thread_lock:
+            self.stats[stat] += 1
+
+    @contextmanager
+    def lock(self):
+        """Bloqueo exclusivo del directorio (reentrante dentro del mismo hilo)"""
+        depth = getattr(self._local, "depth", 0)
+        if depth:
+            self._local.depth += 1
+            try:
+                yield
+            finally:
+                self._local.depth -= 1
+            return
+        with open(os.path.join(self.directory, ".lock"), "a") as handle:
+            if fcntl is not None:
+                fcntl.flock(handle, fcntl.LOCK_EX)
+            self._local.depth = 1
+            try:
+                yield
+            finally:
+                self._local.depth = 0
+                if fcntl is not None:
+                    fcntl.flock(handle, fcntl.LOCK_UN)
+
+    def load(self, key):
+        """Valor guardado en ``key`` o ``None``"""
+        path = self._path(key)
+        try:
+            with open(path, "rb") as f:
+                value = pickle.load(f)
+        except FileNotFoundError:
+            self._count("misses")
+            return None
+        except Exception:
+            # Fichero truncado o corrupto: se descarta
+            self._count("errors")
+            self._count("misses")
+            self.delete(key)
+            return None
+        try:
+            os.utime(path)
+        except OSError:
+            pass
+        self._count("hits")
+        return value
+
+    def store(self, key, value):
+        """Escribe ``value`` de forma atómica y expulsa entradas si se supera el presupuesto"""
+        fd, tmp = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                pickle.dump(value, f, protocol=pickle.HIGHEST_PROTOCOL)
+            with self.lock():
+                os.replace(tmp, self._path(key))
+                self._evict(keep=key)
+        except BaseException:
+            if os.path.exists(tmp):
+                os.remove(tmp)
+            raise
+
+    def delete(self, key):
+        with self.lock():
+            try:
+                os.remove(self._path(key))
+            except FileNotFoundError:
+                pass
+
+    def entries(self):
+        """``[(ruta, bytes, último acceso)]`` de las entradas guardadas"""
+        out = []
+        for name in os.listdir(self.directory):
+            if name.endswith(self.SUFFIX):
+                path = os.path.join(self.directory, name)
+                try:
+                    st = os.stat(path)
+                except FileNotFoundError:
+                    continue
+                out.append((path, st.st_size, st.st_mtime))
+        return out
+
+    def size(self):
+        """Bytes ocupados por la caché"""
+        return sum(size for _, size, _ in self.entries())
+
+    def _evict(self, keep=None):
+        entries = self.entries()
+        total = sum(size for _, size, _ in entries)
+        keep_path = self._path(keep) if keep is not None else None
+        for path, size, _ in sorted(entries, key=lambda e: e[2]):
+            if total <= self.max_bytes:
+                break
+            if path == keep_path:
+                continue
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                continue
+            total -= size
+            self._count("evictions")
+
+
+class IntervalCache:
+    """Caché de precios diarios por ticker con un único rango cubierto contiguo.
+
+    Las filas posteriores al último dato caducan en el siguiente cierre de
+    mercado (``next_data_ready``): a partir de entonces ese tramo final se
+    vuelve a pedir, aunque estuviera dentro del rango cubierto.
+
+    ``version()`` devuelve la marca de los datos de origen (p. ej. la del
+    almacén Parquet). Cada entrada guarda la marca con la que se creó y se
+    descarta cuando deja de coincidir: una redescarga completa con otra base
+    de ajuste no se empalma con filas antiguas.
+    """
+
+    def __init__(self, directory, max_bytes=256 * 1024 ** 2, clock=time.time, version=None):
+        self.disk = DiskCache(directory, max_bytes)
+        self.clock = clock
+        self.version = version or (lambda: None)
+        self.stats = {"hits": 0, "misses": 0}
+        self._stats_lock = threading.Lock()
+
+    def _entry(self, ticker, version=None):
+        """Entrada vigente de ``ticker`` (``None`` si no hay o es de otra versión de los datos)"""
+        entry = self.disk.load(ticker)
+        if entry is None:
+            return None
+        if entry.get("version") != (self.version() if version is None else version):
+            self.disk.delete(ticker)
+            return None
+        return entry
+
+    def _covered(self, entry):
+        """Rango cubierto vigente: al caducar, el final retrocede al último dato"""
+        start, end = entry["start"], entry["end"]
+        if self.clock() >= entry["expires"]:
+            data = entry["data"]
+            end = min(end, data.index.max()) if not data.empty else start - _DAY
+        return start, end
+
+    def covered(self, ticker):
+        """Rango ``(inicio, fin)`` cubierto y vigente para ``ticker`` o ``None``"""
+        entry = self._entry(ticker)
+        return self._covered(entry) if entry else None
+
+    def missing(self, ticker, start, end):
+        """Tramos de ``[start, end]`` que faltan en la caché, como lista de ``(inicio, fin)``"""
+        start, end = pd.Timestamp(start), pd.Timestamp(end)
+        rng = self.covered(ticker)
+        if rng is None or rng[1] < rng[0]:
+            gaps = [(start, end)]
+        else:
+            gaps = []
+            if start < rng[0]:
+                gaps.append((start, rng[0] - _DAY))
+            if end > rng[1]:
+                gaps.append((rng[1] + _DAY, end))
+        with self._stats_lock:
+            self.stats["misses" if gaps else "hits"] += 1
+        return gaps
+
+    def extend(self, ticker, rows, start, end):
+        """Añade las filas del tramo ``[start, end]`` y amplía el rango cubierto.
+
+        El tramo debe ser contiguo al rango ya cubierto (o solaparse con él)
+        para que la caché siga describiendo un único intervalo sin huecos.
+        """
+        start, end = pd.Timestamp(start), pd.Timestamp(end)
+        expires = next_data_ready(self.clock()).timestamp()
+        version = self.version()
+        with self.disk.lock():
+            entry = self._entry(ticker, version)
+            if entry is not None:
+                data = pd.concat([entry["data"], rows])
+                data = data[~data.index.duplicated(keep='last')].sort_index()
+                if end < entry["end"]:
+                    # Solo una descarga que llega al final renueva la frescura del tramo final
+                    expires = entry["expires"]
+                start, end = min(start, entry["start"]), max(end, entry["end"])
+            else:
+                data = rows.sort_index()
+            self.disk.store(ticker, {"data": data, "start": start, "end": end, "expires": expires,
+                                     "version": version})
+
+    def get(self, ticker, start, end):
+        """Filas diarias de ``[start, end]`` o ``None`` si el rango no está cubierto"""
+        start, end = pd.Timestamp(start), pd.Timestamp(end)
+        entry = self._entry(ticker)
+        if entry is None or start < entry["start"] or end > entry["end"]:
+            return None
+        data = entry["data"]
+        return data[(data.index >= start) & (data.index <= end)]
@@ -0,0 +1,20 @@
+"""Configuración compartida por el dashboard, los scripts y los workers."""
+
+# FMP API Keys
+FMP_KEYS = ["6cb32e81af450a825085ffeef279c5c2", "FedUgaGEN9Pv19qgVxh2nHw0JWg5V6uh","P95gSmpsyRFELMKi8t7tSC0tn5y5JBlg"]
+FMP_LIMIT_PER_MINUTE = 20
+FMP_LIMIT_PER_DAY = 250
+# Días sin datos locales a partir de los cuales se completa con FMP
+FMP_STALE_DAYS = 7
+DOWNLOAD_WORKERS = 8
+# Procesos para calcular estrategias en paralelo (1 = en el propio proceso). Las 10
+# estrategias tardan ~0.2 s en serie y arrancar un pool (spawn + importar pandas)
+# cuesta segundos, así que por defecto se calcula en el propio proceso.
+STRATEGY_WORKERS = 1
+
+# Directorio para la caché
+CACHE_DIR = "cache"
+CACHE_MAX_BYTES = 256 * 1024 ** 2  # presupuesto de disco de la caché de precios
+
+# CSV publicados en GitHub (último recurso si no hay copia local)
+GITHUB_DATA_URL = "https://raw.githubusercontent.com/jmlestevez-source/taa-dashboard/main/data/"
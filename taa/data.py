@@ -0,0 +1,327 @@
+"""Carga de precios para el backtest sin dependencias de Streamlit.
+
+El histórico sale del almacén local (``data/prices.parquet``, mapeado en
+memoria), del CSV del repo o, como último recurso, del CSV publicado en
+GitHub; si los datos locales están desfasados se completan solo las fechas
+que faltan con FMP. Esas filas de FMP (cierres sin ajustar) se guardan aparte,
+en ``cache/fmp_delta.parquet``: ``data/prices.parquet`` solo lo escribe
+``update_csv.py``. Los precios diarios se guardan en una caché por rango y se
+devuelven ya remuestreados a fin de mes.
+
+Los avisos no se muestran aquí: se acumulan en un :class:`LoadReport` que el
+llamador (dashboard o script) presenta como prefiera.
+"""
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+import pandas as pd
+
+from taa import config
+from taa.cache import IntervalCache, purge_legacy
+from taa.panel import ensure_panel, source_stamp
+from taa.store import (DATA_DIR, append_price_store, csv_path, read_price_csv, read_price_store,
+                       store_path)
+
+
+class LoadReport:
+    """Avisos de una carga: ``messages`` es ``[(nivel, texto)]`` con nivel ``"error"`` o ``"warning"``.
+
+    ``failed`` indica que algún dato no se pudo obtener (los 403 de FMP
+    compensados con el CSV no cuentan). Es seguro compartirlo entre hilos.
+    """
+
+    def __init__(self):
+        self.messages = []
+        self.failed = False
+        self._lock = threading.Lock()
+
+    def add(self, level, text, failed=False):
+        with self._lock:
+            self.messages.append((level, text))
+            self.failed = self.failed or failed
+
+
+def should_use_fmp(csv_df, days_threshold=config.FMP_STALE_DAYS, now=None):
+    """Verifica si es necesario usar FMP basado en la frescura de los datos CSV"""
+    if csv_df.empty:
+        return True
+    last_csv_date = csv_df.index.max()
+    today = (now if now is not None else pd.Timestamp.now()).normalize()
+    if (today - last_csv_date).days < days_threshold:
+        return False
+    return True
+
+
+def clean_and_align(data_dict, report=None):
+    """Une los precios mensuales de cada ticker en un panel sin huecos (vacío si no hay datos)"""
+    report = report or LoadReport()
+    if not data_dict:
+        report.add("error", "❌ No hay datos para procesar", failed=True)
+        return pd.DataFrame()
+    try:
+        df = pd.concat(data_dict.values(), axis=1)
+        if df.empty:
+            report.add("error", "❌ DataFrame concatenado vacío", failed=True)
+            return pd.DataFrame()
+        df = df.dropna(axis=1, how='all')
+        df = df.ffill().bfill()
+        df = df.dropna(how='all')
+        return df
+    except Exception as e:
+        report.add("error", f"❌ Error alineando datos: {e}", failed=True)
+        return pd.DataFrame()
+
+
+class PriceLoader:
+    """Descarga y caché de precios mensuales por ticker.
+
+    Los recursos (caché de precios, sesión HTTP, cuota de FMP y panel
+    mapeado) se crean al primer uso, así que importar o instanciar el
+    cargador no toca el disco ni la red. Una instancia se puede compartir
+    entre hilos; ``now`` permite fijar el reloj en pruebas.
+    """
+
+    def __init__(self, cache_dir=config.CACHE_DIR, data_dir=DATA_DIR, fmp_keys=config.FMP_KEYS,
+                 workers=config.DOWNLOAD_WORKERS, now=pd.Timestamp.now):
+        self.cache_dir = cache_dir
+        self.data_dir = data_dir
+        self.fmp_keys = list(fmp_keys)
+        self.workers = workers
+        self.now = now
+        self._panel = None
+        self._panel_stamp = None
+        self._resources = {}
+        self._lock = threading.Lock()
+
+    # ----- recursos compartidos -----
+    def _resource(self, name, build):
+        with self._lock:
+            if name not in self._resources:
+                self._resources[name] = build()
+            return self._resources[name]
+
+    @property
+    def price_cache(self):
+        """Precios diarios por ticker con el rango de fechas ya cubierto"""
+        return self._resource("prices", self._build_price_cache)
+
+    def _build_price_cache(self):
+        # Los pickles md5 de la caché anterior quedarían fuera del presupuesto para siempre
+        purge_legacy(self.cache_dir)
+        # Las entradas se atan a la versión del almacén local y al reloj del cargador
+        return IntervalCache(os.path.join(self.cache_dir, "prices"), max_bytes=config.CACHE_MAX_BYTES,
+                             clock=lambda: self.now().to_pydatetime().timestamp(),
+                             version=lambda: source_stamp(store_path(self.data_dir)))
+
+    @property
+    def session(self):
+        """Sesión HTTP compartida: pool de conexiones, reintentos y revalidación ETag/If-Modified-Since"""
+        from taa.http import build_session
+        return self._resource("session", lambda: build_session(
+            os.path.join(self.cache_dir, "http_cache"), pool_size=2 * self.workers))
+
+    @property
+    def delta_path(self):
+        """Almacén de las filas recientes de FMP, fuera del ``data/`` versionado"""
+        return os.path.join(self.cache_dir, "fmp_delta.parquet")
+
+    @property
+    def quota(self):
+        """Cuota por key (minuto y día), compartida entre hilos, sesiones y reinicios"""
+        from taa.ratelimit import KeyQuota
+        return self._resource("quota", lambda: KeyQuota(
+            self.fmp_keys, config.FMP_LIMIT_PER_MINUTE, config.FMP_LIMIT_PER_DAY,
+            os.path.join(self.cache_dir, "fmp_quota.sqlite")))
+
+    def today(self):
+        return self.now().normalize()
+
+    def panel(self, report=None):
+        """Almacén local de precios diarios como panel mapeado en memoria (vacío si no hay).
+
+        Cada llamada compara el tamaño y la fecha de modificación del Parquet
+        con los del panel en memoria y lo reconstruye si han cambiado; mientras
+        no cambien, todas las llamadas comparten el mismo panel de solo lectura.
+        """
+        path = store_path(self.data_dir)
+        with self._lock:
+            stamp = source_stamp(path)
+            if self._panel is None or stamp != self._panel_stamp:
+                try:
+                    panel = ensure_panel(path, os.path.join(self.cache_dir, "panel"), read_price_store)
+                except Exception as e:
+                    (report or LoadReport()).add("warning", f"⚠️ Error leyendo el almacén local de precios: {e}")
+                    return pd.DataFrame()
+                self._panel = panel if panel is not None else pd.DataFrame()
+                self._panel_stamp = stamp
+            return self._panel
+
+    # ----- fuentes -----
+    def history(self, ticker, report=None):
+        """Carga datos históricos: almacén Parquet local, CSV del repo y, como último recurso, CSV en GitHub"""
+        report = report or LoadReport()
+        store = self.panel(report)
+        if ticker in store.columns:
+            return store[[ticker]].dropna().rename_axis(None)
+        try:
+            local_file = csv_path(ticker, self.data_dir)
+            if os.path.exists(local_file):
+                with open(local_file, encoding='utf-8') as f:
+                    return self._parse_csv(f.read(), ticker, report)
+            response = self.session.get(f"{config.GITHUB_DATA_URL}{ticker}.csv", timeout=30)
+            if response.status_code == 200:
+                return self._parse_csv(response.content.decode('utf-8'), ticker, report)
+            report.add("error", f"❌ Error HTTP {response.status_code} cargando {ticker} desde CSV")
+            return pd.DataFrame()
+        except Exception as e:
+            report.add("error", f"❌ Error cargando {ticker} desde CSV: {str(e)}")
+            return pd.DataFrame()
+
+    @staticmethod
+    def _parse_csv(text, ticker, report):
+        df = read_price_csv(text, ticker)
+        if df.empty:
+            report.add("error", f"❌ No se pudieron parsear datos de {ticker}.csv")
+        return df
+
+    def fmp(self, ticker, start=None, end=None, days=365*10, report=None):
+        """Obtiene de FMP los datos históricos entre ``start`` y ``end`` (por defecto, los últimos ``days`` días)"""
+        report = report or LoadReport()
+        if not self.fmp_keys:
+            # Sin keys (p. ej. ejecuciones sin red) solo se usan los datos locales
+            return pd.DataFrame()
+        try:
+            end = pd.Timestamp(end).normalize() if end is not None else self.today()
+            start = pd.Timestamp(start).normalize() if start is not None else end - pd.Timedelta(days=days)
+            # Espera al primer token libre de cualquier key
+            api_key = self.quota.acquire()
+            if api_key is None:
+                report.add("warning", "⚠️ Todas las API keys de FMP han alcanzado el límite diario.")
+                return pd.DataFrame()
+            url = (f"https://financialmodelingprep.com/api/v3/historical-price-full/{ticker}"
+                   f"?from={start:%Y-%m-%d}&to={end:%Y-%m-%d}&apikey={api_key}")
+            response = self.session.get(url, timeout=60)
+            if response.status_code == 200:
+                data = response.json()
+                if 'historical' in data and data['historical']:
+                    df = pd.DataFrame(data['historical'])
+                    df['date'] = pd.to_datetime(df['date'])
+                    df = df.set_index('date')
+                    df = df[['close']].rename(columns={'close': ticker}).rename_axis(None).sort_index()
+                    df[ticker] = pd.to_numeric(df[ticker], errors='coerce')
+                    return df[(df.index >= start) & (df.index <= end)]
+                report.add("warning", f"⚠️ Datos vacíos de FMP para {ticker}", failed=True)
+                return pd.DataFrame()
+            if response.status_code == 403:
+                # Sin aviso: el CSV local compensa el acceso denegado
+                return pd.DataFrame()
+            report.add("warning", f"⚠️ Error HTTP {response.status_code} obteniendo datos de FMP para {ticker}",
+                       failed=True)
+            return pd.DataFrame()
+        except Exception as e:
+            report.add("error", f"❌ Error obteniendo datos de FMP para {ticker}: {e}", failed=True)
+            return pd.DataFrame()
+
+    def delta(self, ticker, after, report=None):
+        """Filas de FMP ya descargadas para ``ticker`` posteriores a ``after``"""
+        try:
+            rows = read_price_store(self.delta_path, tickers=[ticker])
+        except Exception as e:
+            (report or LoadReport()).add("warning", f"⚠️ Error leyendo las filas recientes de FMP: {e}")
+            return pd.DataFrame()
+        if ticker not in rows.columns:
+            return pd.DataFrame()
+        rows = rows[[ticker]].dropna().rename_axis(None)
+        return rows[rows.index > after]
+
+    def daily(self, ticker, start, end, report=None):
+        """Precios diarios de ``[start, end]``: histórico local + solo las fechas que faltan desde FMP.
+
+        Las filas de FMP se añaden tras el último dato local y se guardan en
+        :attr:`delta_path`; en cuanto ``update_csv.py`` trae esas fechas al
+        almacén, prevalecen los precios ajustados. Devuelve ``None`` si no hay
+        ninguna fuente disponible para el ticker.
+        """
+        report = report or LoadReport()
+        local_df = self.history(ticker, report)
+        if local_df.empty:
+            # Sin histórico local: descarga de FMP del tramo pedido
+            combined_df = self.fmp(ticker, start=start, end=end, report=report)
+            if combined_df.empty:
+                return None
+        else:
+            combined_df = pd.concat([local_df, self.delta(ticker, local_df.index.max(), report)])
+            if should_use_fmp(combined_df, now=self.now()) and combined_df.index.max() < end:
+                # Solo la ventana que falta: del día siguiente al último dato conocido hasta el final del tramo
+                recent_df = self.fmp(ticker, start=max(combined_df.index.max() + pd.Timedelta(days=1), start),
+                                     end=end, report=report)
+                if not recent_df.empty:
+                    combined_df = pd.concat([combined_df, recent_df])
+                    combined_df = combined_df[~combined_df.index.duplicated(keep='last')].sort_index()
+                    try:
+                        append_price_store(recent_df, self.delta_path)
+                    except Exception as e:
+                        report.add("warning", f"⚠️ No se pudieron guardar las filas recientes de {ticker}: {e}")
+        return combined_df[(combined_df.index >= start) & (combined_df.index <= end)]
+
+    def monthly(self, ticker, start, end, report=None):
+        """Datos mensuales de ``ticker``: se recortan de la caché diaria y solo se descargan los tramos que falten"""
+        report = report or LoadReport()
+        start = pd.Timestamp(start).normalize()
+        # No hay datos futuros: el rango cubierto llega como mucho hasta hoy
+        end = min(pd.Timestamp(end).normalize(), self.today())
+        try:
+            for gap_start, gap_end in self.price_cache.missing(ticker, start, end):
+                rows = self.daily(ticker, gap_start, gap_end, report)
+                if rows is None:
+                    report.add("error", f"❌ No se pudieron cargar datos de {ticker} (ni CSV ni FMP)", failed=True)
+                    return pd.DataFrame()
+                self.price_cache.extend(ticker, rows, gap_start, gap_end)
+            daily_df = self.price_cache.get(ticker, start, end)
+            if daily_df is not None and not daily_df.empty:
+                return daily_df.resample('ME').last()
+            report.add("warning", f"⚠️ No hay datos disponibles en el rango para {ticker}", failed=True)
+        except Exception as e:
+            report.add("error", f"❌ Error procesando {ticker}: {e}", failed=True)
+            try:
+                csv_df = self.history(ticker, report)
+                if not csv_df.empty:
+                    csv_df_filtered = csv_df[(csv_df.index >= start) & (csv_df.index <= end)]
+                    if not csv_df_filtered.empty:
+                        return csv_df_filtered.resample('ME').last()
+            except Exception:
+                pass
+        return pd.DataFrame()
+
+    def load(self, tickers, start, end, report=None, progress=None):
+        """Precios mensuales de ``tickers`` descargados en paralelo, como ``{ticker: DataFrame}``.
+
+        El límite de FMP lo controla la cuota compartida, no esperas fijas.
+        ``progress(hechos, total)`` se llama desde el hilo que invoca ``load``
+        a medida que termina cada ticker. El resultado mantiene el orden de
+        ``tickers`` y omite los que no tienen datos.
+        """
+        report = report or LoadReport()
+        results = {}
+        total = len(tickers)
+        with ThreadPoolExecutor(max_workers=max(1, min(self.workers, total))) as pool:
+            futures = {pool.submit(self.monthly, tk, start, end, report): tk for tk in tickers}
+            for done, future in enumerate(as_completed(futures), 1):
+                tk = futures[future]
+                try:
+                    results[tk] = future.result()
+                except Exception as e:
+                    report.add("error", f"❌ Error procesando {tk}: {e}", failed=True)
+                if progress is not None:
+                    progress(done, total)
+        data = {}
+        for tk in tickers:
+            if tk not in results:
+                continue
+            df = results[tk]
+            if not df.empty and len(df) > 0:
+                data[tk] = df
+            else:
+                report.add("warning", f"⚠️ {tk} no disponible", failed=True)
+        return data
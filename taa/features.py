@@ -0,0 +1,80 @@
+"""Almacén de matrices derivadas (precios retardados, ROC, SMA) compartido por ejecución."""
+import hashlib
+
+import numpy as np
+import pandas as pd
+
+from taa.rolling import RollingMoments
+
+
+def data_version(prices):
+    """Huella del panel de precios: cambia si cambian fechas, tickers o valores"""
+    h = hashlib.sha1()
+    h.update(pd.util.hash_pandas_object(prices, index=True).to_numpy().tobytes())
+    h.update("\x1f".join(map(str, prices.columns)).encode())
+    return h.hexdigest()
+
+
+def lagged(values, n):
+    """Desplaza la matriz ``n`` filas hacia abajo rellenando con NaN"""
+    out = np.full(values.shape, np.nan)
+    if n < len(values):
+        out[n:] = values[:len(values) - n]
+    return out
+
+
+class FeatureStore:
+    """Caché de matrices calculadas sobre uno o varios paneles de precios.
+
+    Las entradas se indexan por (versión de datos, tipo, lookback), así que
+    todas las estrategias que piden el mismo ROC/SMA sobre el mismo panel
+    comparten una única matriz. Los paneles se tratan como inmutables.
+    """
+
+    def __init__(self):
+        self._matrices = {}
+        self._versions = {}
+        self.hits = 0
+        self.misses = 0
+
+    def version(self, prices):
+        """Versión de datos del panel (memorizada mientras viva el almacén)"""
+        entry = self._versions.get(id(prices))
+        if entry is None or entry[0] is not prices:
+            # Guardamos la referencia para que el id no pueda reutilizarse
+            entry = (prices, data_version(prices))
+            self._versions[id(prices)] = entry
+        return entry[1]
+
+    def get(self, prices, kind, lookback, build):
+        """Devuelve la matriz ``kind``/``lookback`` calculándola con ``build`` una sola vez"""
+        key = (self.version(prices), kind, lookback)
+        if key in self._matrices:
+            self.hits += 1
+        else:
+            self.misses += 1
+            self._matrices[key] = build()
+        return self._matrices[key]
+
+    def values(self, prices):
+        """Precios como matriz float"""
+        return self.get(prices, "values", 0, lambda: prices.to_numpy(dtype=float))
+
+    def lagged(self, prices, n):
+        """Matriz de precios ``p_{t-n}``"""
+        return self.get(prices, "lagged", n, lambda: lagged(self.values(prices), n))
+
+    def ratio(self, prices, n):
+        """Matriz ``p_t / p_{t-n}``, base de todos los ROC"""
+        def build():
+            with np.errstate(divide='ignore', invalid='ignore'):
+                return self.values(prices) / self.lagged(prices, n)
+        return self.get(prices, "ratio", n, build)
+
+    def moments(self, prices):
+        """Sumas acumuladas de rentabilidades para correlaciones móviles (:class:`~taa.rolling.RollingMoments`)"""
+        return self.get(prices, "moments", 0, lambda: RollingMoments(self.values(prices)))
+
+    def scores(self, prices, fn, *args):
+        """Panel de puntuaciones ``fn(prices, *args)`` compartido entre estrategias"""
+        return self.get(prices, fn.__name__, args, lambda: fn(prices, *args, features=self))
@@ -0,0 +1,55 @@
+"""Sesión HTTP compartida para las descargas de CSV y FMP.
+
+Una única sesión reutiliza conexiones (keep-alive) entre todos los hilos de
+descarga, reintenta con backoff los errores transitorios y, si
+``requests-cache`` está disponible, guarda las respuestas y las revalida con
+``If-None-Match``/``If-Modified-Since``: un CSV sin cambios vuelve como 304
+sin cuerpo. Las respuestas de FMP no se guardan (cada ventana de fechas es una
+URL distinta y son datos de mercado que no deben servirse viejos) y las demás
+se purgan al crear la sesión cuando superan ``max_age``.
+"""
+from datetime import timedelta
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+try:
+    import requests_cache
+except ImportError:  # sin requests-cache: sesión con pool y reintentos, sin revalidación
+    requests_cache = None
+
+RETRY_STATUS = (429, 500, 502, 503, 504)
+# Hosts cuyas respuestas nunca se guardan
+UNCACHED_HOSTS = ("financialmodelingprep.com",)
+
+
+def build_session(cache_path=None, retries=3, backoff=0.5, pool_size=16, max_age=timedelta(days=30)):
+    """Crea la sesión compartida.
+
+    ``cache_path`` es la ruta del SQLite de respuestas (sin caché si es
+    ``None``). Las respuestas sin ``Cache-Control`` se guardan pero se
+    revalidan en cada petición; ``apikey`` no forma parte de la clave de caché.
+    Al crearla se borran las respuestas guardadas hace más de ``max_age``.
+    """
+    if cache_path is not None and requests_cache is not None:
+        session = requests_cache.CachedSession(
+            cache_path, backend="sqlite",
+            expire_after=requests_cache.EXPIRE_IMMEDIATELY,
+            urls_expire_after={host: requests_cache.DO_NOT_CACHE for host in UNCACHED_HOSTS},
+            cache_control=True,
+            ignored_parameters=["apikey"],
+        )
+        # Tope de antigüedad: como mucho cuesta una descarga completa más por CSV y ``max_age``
+        session.cache.delete(older_than=max_age)
+        session.cache.responses.vacuum()
+    else:
+        session = requests.Session()
+    retry = Retry(total=retries, backoff_factor=backoff, status_forcelist=RETRY_STATUS,
+                  allowed_methods=["GET", "HEAD"], respect_retry_after_header=True,
+                  raise_on_status=False)
+    adapter = HTTPAdapter(max_retries=retry, pool_connections=pool_size, pool_maxsize=pool_size)
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    session.headers["User-Agent"] = "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36"
+    return session
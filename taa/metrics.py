@@ -0,0 +1,26 @@
+"""Métricas de rendimiento sobre retornos mensuales."""
+import numpy as np
+
+EMPTY_METRICS = {"CAGR": 0, "MaxDD": 0, "Sharpe": 0, "Vol": 0}
+
+
+def calc_metrics(rets):
+    """CAGR, máximo drawdown y volatilidad (en %) y Sharpe anualizado de ``rets``"""
+    rets = rets.dropna()
+    if len(rets) < 2:
+        return dict(EMPTY_METRICS)
+    eq = (1 + rets).cumprod()
+    yrs = len(rets) / 12
+    if yrs <= 0 or eq.iloc[-1] <= 0:
+        cagr = 0
+    else:
+        cagr = eq.iloc[-1] ** (1 / yrs) - 1
+    if len(eq) == 0 or eq.cummax().iloc[-1] == 0:
+        dd = 0
+    else:
+        dd_series = (eq / eq.cummax()) - 1
+        dd = dd_series.min()
+    sharpe = (rets.mean() / rets.std()) * np.sqrt(12) if rets.std() != 0 else 0
+    vol = rets.std() * np.sqrt(12)
+    return {"CAGR": round(cagr * 100, 2), "MaxDD": round(dd * 100, 2),
+            "Sharpe": round(sharpe, 2), "Vol": round(vol * 100, 2)}
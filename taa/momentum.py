@@ -0,0 +1,98 @@
+"""Puntuaciones de momentum vectorizadas sobre el panel fechas × tickers.
+
+Cada función recibe el DataFrame de precios mensuales alineados y devuelve un
+DataFrame con la misma forma. La fila ``t`` contiene la puntuación que la
+función escalar equivalente de :mod:`taa.reference` devolvería para
+``df.iloc[:t + 1]``, incluidos los valores por defecto cuando no hay historia
+suficiente.
+
+Los ratios de precios se leen de un :class:`~taa.features.FeatureStore`; si no
+se pasa ninguno se usa uno temporal.
+"""
+import numpy as np
+import pandas as pd
+
+from taa.features import FeatureStore
+
+
+def _history_mask(values, min_len):
+    """Filas con al menos ``min_len`` observaciones (``len(df_subset) >= min_len``)"""
+    return (np.arange(len(values)) + 1 >= min_len)[:, None]
+
+
+def _as_frame(prices, values):
+    return pd.DataFrame(values, index=prices.index, columns=prices.columns)
+
+
+def _store(features):
+    return features if features is not None else FeatureStore()
+
+
+def keller_scores(prices, features=None):
+    """Panel de ``momentum_score_keller`` (DAA Keller, VAA-12)"""
+    fs = _store(features)
+    values = fs.values(prices)
+    score = (12 * fs.ratio(prices, 1) + 4 * fs.ratio(prices, 3)
+             + 2 * fs.ratio(prices, 6) + fs.ratio(prices, 12) - 19)
+    return _as_frame(prices, np.where(_history_mask(values, 13), score, 0.0))
+
+
+def roc4_scores(prices, features=None):
+    """Panel de ``momentum_score_roc4`` (Dual Momentum ROC4)"""
+    fs = _store(features)
+    values = fs.values(prices)
+    p4 = fs.lagged(prices, 4)
+    valid = _history_mask(values, 5) & ~np.isnan(p4) & (p4 > 0)
+    return _as_frame(prices, np.where(valid, fs.ratio(prices, 4) - 1, 0.0))
+
+
+def accel_dual_mom_scores(prices, features=None):
+    """Panel de ``momentum_score_accel_dual_mom``: media de ROC 1, 3 y 6 meses"""
+    fs = _store(features)
+    values = fs.values(prices)
+    score = ((fs.ratio(prices, 1) - 1) + (fs.ratio(prices, 3) - 1) + (fs.ratio(prices, 6) - 1)) / 3
+    invalid = (fs.lagged(prices, 1) <= 0) | (fs.lagged(prices, 3) <= 0) | (fs.lagged(prices, 6) <= 0)
+    return _as_frame(prices, np.where(_history_mask(values, 7) & ~invalid, score, 0.0))
+
+
+def roc_scores(prices, n, features=None):
+    """Panel de ``roc_3``/``roc_6``/``roc_12``: -inf sin historia o precio base no positivo"""
+    fs = _store(features)
+    values = fs.values(prices)
+    valid = _history_mask(values, n + 1) & ~(fs.lagged(prices, n) <= 0)
+    return _as_frame(prices, np.where(valid, fs.ratio(prices, n) - 1, -np.inf))
+
+
+def sma_scores(prices, n=12, features=None):
+    """Panel de ``sma_12``: 0 si la ventana tiene nulos o precios no positivos"""
+    values = _store(features).values(prices)
+    out = np.zeros(values.shape)
+    if len(values) >= n:
+        windows = np.lib.stride_tricks.sliding_window_view(values, n, axis=0)
+        bad = (np.isnan(windows) | (windows <= 0)).any(axis=-1)
+        out[n - 1:] = np.where(bad, 0.0, windows.mean(axis=-1))
+    return _as_frame(prices, out)
+
+
+def _roc_1_3_6_12(prices, fs):
+    rocs = [fs.ratio(prices, n) - 1 for n in (1, 3, 6, 12)]
+    invalid = np.zeros(rocs[0].shape, dtype=bool)
+    for n in (1, 3, 6, 12):
+        invalid |= fs.lagged(prices, n) <= 0
+    return rocs, invalid
+
+
+def momentum_13612w_scores(prices, features=None):
+    """Panel de ``momentum_score_13612w``"""
+    fs = _store(features)
+    (r1, r3, r6, r12), invalid = _roc_1_3_6_12(prices, fs)
+    score = 12 * r1 + 4 * r3 + 2 * r6 + 1 * r12
+    return _as_frame(prices, np.where(_history_mask(r1, 13) & ~invalid, score, 0.0))
+
+
+def haa_scores(prices, features=None):
+    """Panel de ``haa_momentum_score``: media no ponderada de ROC 1, 3, 6 y 12 meses"""
+    fs = _store(features)
+    (r1, r3, r6, r12), invalid = _roc_1_3_6_12(prices, fs)
+    score = (r1 + r3 + r6 + r12) / 4
+    return _as_frame(prices, np.where(_history_mask(r1, 13) & ~invalid, score, -np.inf))
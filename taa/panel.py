@@ -0,0 +1,111 @@
+"""Panel de precios (fechas × tickers) en un ``.npy`` mapeado en memoria.
+
+Los valores se guardan una sola vez como matriz float64 y un JSON pequeño
+describe las fechas y los tickers. Cada sesión (o proceso) mapea el fichero
+en modo solo lectura, así que todas comparten las mismas páginas del sistema
+operativo y abrir el panel apenas cuesta más que leer el JSON.
+
+Cada versión escribe un ``.npy`` nuevo y el JSON apunta a él: quien ya tenga
+mapeada la versión anterior sigue leyéndola sin problemas.
+"""
+import json
+import os
+import tempfile
+import uuid
+
+import numpy as np
+import pandas as pd
+
+PANEL_NAME = "prices"
+
+
+def _meta_path(directory, name):
+    return os.path.join(directory, f"{name}.json")
+
+
+def _write_atomic(path, write):
+    fd, tmp = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            write(f)
+        os.replace(tmp, path)
+    except BaseException:
+        if os.path.exists(tmp):
+            os.remove(tmp)
+        raise
+
+
+def read_panel_meta(directory, name=PANEL_NAME):
+    """Contenido del JSON del panel o ``None`` si no existe o es ilegible"""
+    try:
+        with open(_meta_path(directory, name), encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def write_panel(prices, directory, name=PANEL_NAME, source=None):
+    """Guarda ``prices`` (fechas × tickers) como panel mapeable.
+
+    ``source`` es una marca opcional del origen de los datos (ver
+    :func:`source_stamp`) para saber después si el panel está al día.
+    """
+    os.makedirs(directory, exist_ok=True)
+    prices = pd.DataFrame(prices).sort_index()
+    values = np.ascontiguousarray(prices.to_numpy(dtype=np.float64))
+    data_file = f"{name}-{uuid.uuid4().hex[:12]}.npy"
+    _write_atomic(os.path.join(directory, data_file), lambda f: np.save(f, values))
+    meta = {
+        "data": data_file,
+        "shape": list(values.shape),
+        "dates": pd.DatetimeIndex(prices.index).strftime("%Y-%m-%d").tolist(),
+        "tickers": [str(c) for c in prices.columns],
+        "source": source,
+    }
+    previous = read_panel_meta(directory, name)
+    _write_atomic(_meta_path(directory, name), lambda f: f.write(json.dumps(meta).encode("utf-8")))
+    if previous and previous.get("data") != data_file:
+        # Los procesos que aún la tengan mapeada conservan su copia hasta cerrarla
+        try:
+            os.remove(os.path.join(directory, previous["data"]))
+        except OSError:
+            pass
+    return meta
+
+
+def load_panel(directory, name=PANEL_NAME):
+    """DataFrame de solo lectura sobre el ``.npy`` mapeado; ``None`` si no hay panel"""
+    meta = read_panel_meta(directory, name)
+    if meta is None:
+        return None
+    try:
+        values = np.load(os.path.join(directory, meta["data"]), mmap_mode="r")
+    except (OSError, ValueError):
+        return None
+    if list(values.shape) != meta["shape"]:
+        return None
+    index = pd.DatetimeIndex(pd.to_datetime(meta["dates"], format="%Y-%m-%d"), name="Date")
+    return pd.DataFrame(values, index=index, columns=meta["tickers"], copy=False)
+
+
+def source_stamp(path):
+    """Marca (tamaño y fecha de modificación) de un fichero origen, ``None`` si no existe"""
+    try:
+        st = os.stat(path)
+    except OSError:
+        return None
+    return [st.st_size, st.st_mtime_ns]
+
+
+def ensure_panel(source_path, directory, read, name=PANEL_NAME):
+    """Panel al día con ``source_path``: se reconstruye con ``read(source_path)`` si ha cambiado.
+
+    Devuelve el panel mapeado, o ``None`` si no existe el origen.
+    """
+    stamp = source_stamp(source_path)
+    if stamp is None:
+        return None
+    meta = read_panel_meta(directory, name)
+    if meta is None or meta.get("source") != stamp:
+        write_panel(read(source_path), directory, name, source=stamp)
+    return load_panel(directory, name)
@@ -0,0 +1,118 @@
+"""Evaluación de estrategias en un pool de procesos.
+
+En serie, una ejecución con todas las estrategias tarda la suma de todas (y
+Retorno y Correlación domina). :class:`StrategyPool` reparte cada estrategia
+a un proceso y recoge las decisiones según terminan, así que el total se
+acerca al de la más lenta.
+
+El panel mensual alineado no viaja en cada tarea: se publica una vez como
+panel mapeado (:mod:`taa.panel`) en un directorio temporal y cada worker lo
+abre en solo lectura, de modo que todos comparten las mismas páginas de
+memoria. A los workers solo se envían el directorio y el nombre.
+"""
+import multiprocessing
+import os
+import shutil
+import tempfile
+import threading
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from concurrent.futures.process import BrokenProcessPool
+
+from taa.features import FeatureStore
+from taa.panel import load_panel, write_panel
+from taa.strategies import run_strategy
+
+# Panel abierto en este worker: (directorio, panel, FeatureStore)
+_WORKER_PANEL = None
+
+
+def _worker_panel(directory):
+    """Panel compartido de ``directory`` y sus matrices, reutilizados entre tareas del worker"""
+    global _WORKER_PANEL
+    if _WORKER_PANEL is None or _WORKER_PANEL[0] != directory:
+        # Soltamos antes el mapeo anterior
+        _WORKER_PANEL = None
+        panel = load_panel(directory)
+        if panel is None:
+            raise RuntimeError(f"No se pudo abrir el panel compartido en {directory}")
+        _WORKER_PANEL = (directory, panel, FeatureStore())
+    return _WORKER_PANEL[1], _WORKER_PANEL[2]
+
+
+def _evaluate(directory, name):
+    panel, features = _worker_panel(directory)
+    return run_strategy(name, panel, features)
+
+
+class StrategyPool:
+    """Pool de procesos persistente para calcular decisiones de estrategias.
+
+    Con ``workers <= 1`` (o una sola estrategia) se calcula en el propio
+    proceso, sin coste de arranque. Los procesos se crean con ``spawn`` en la
+    primera ejecución en paralelo: no heredan los hilos del servidor de
+    Streamlit y se reutilizan en las siguientes.
+    """
+
+    def __init__(self, workers=None, mp_context="spawn"):
+        self.workers = workers if workers is not None else (os.cpu_count() or 1)
+        self.mp_context = mp_context
+        self._executor = None
+        self._lock = threading.Lock()
+
+    def _pool(self):
+        with self._lock:
+            if self._executor is None:
+                self._executor = ProcessPoolExecutor(max_workers=self.workers,
+                                                     mp_context=multiprocessing.get_context(self.mp_context))
+            return self._executor
+
+    def imap(self, names, df, features=None):
+        """Genera ``(nombre, decisiones, error)`` según termina cada estrategia de ``names`` sobre ``df``"""
+        names = list(names)
+        if self.workers <= 1 or len(names) <= 1:
+            features = features if features is not None else FeatureStore()
+            for name in names:
+                try:
+                    yield name, run_strategy(name, df, features), None
+                except Exception as e:
+                    yield name, None, e
+            return
+        directory = tempfile.mkdtemp(prefix="taa-panel-")
+        try:
+            write_panel(df, directory)
+            pool = self._pool()
+            futures = {pool.submit(_evaluate, directory, name): name for name in names}
+            for future in as_completed(futures):
+                try:
+                    yield futures[future], future.result(), None
+                except BrokenProcessPool as e:
+                    # Un worker murió: se apaga el pool roto sin esperar, se borra el
+                    # panel temporal y el siguiente uso arranca un pool nuevo
+                    self._discard(pool)
+                    shutil.rmtree(directory, ignore_errors=True)
+                    yield futures[future], None, e
+                except Exception as e:
+                    yield futures[future], None, e
+        finally:
+            shutil.rmtree(directory, ignore_errors=True)
+
+    def _discard(self, pool):
+        with self._lock:
+            if self._executor is pool:
+                pool.shutdown(wait=False, cancel_futures=True)
+                self._executor = None
+
+    def evaluate(self, names, df, features=None):
+        """Decisiones ``{nombre: decisiones}``; relanza el primer error"""
+        out = {}
+        for name, decisions, error in self.imap(names, df, features):
+            if error is not None:
+                raise error
+            out[name] = decisions
+        return {name: out[name] for name in names}
+
+    def close(self):
+        with self._lock:
+            if self._executor is not None:
+                self._executor.shutdown(cancel_futures=True)
+                self._executor = None
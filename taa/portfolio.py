@@ -0,0 +1,69 @@
+"""Contabilidad de carteras: matrices densas de pesos y curvas de equity.
+
+Cada señal ``(fecha, pesos)`` abre un periodo de tenencia que dura hasta la
+siguiente fecha de rebalanceo. En lugar de recorrer los retornos fila a fila,
+los pesos se expanden a una matriz fechas × activos y la equity sale de un
+producto matriz-vector y un ``cumprod``.
+"""
+import numpy as np
+import pandas as pd
+
+from taa.signals import as_history
+
+
+def weight_matrix(rebalance_dates, index, columns, histories, asof=True, divisor=1):
+    """Matriz densa fechas × activos con los pesos de cada periodo de tenencia.
+
+    Los periodos empiezan en ``max(fecha de rebalanceo, index[0])``; sus pesos
+    son la suma de la señal de cada histórico en esa fecha (as-of o exacta),
+    divididos por ``divisor``. Devuelve también la máscara de filas cubiertas
+    (las anteriores al primer rebalanceo no lo están).
+    """
+    dates = pd.DatetimeIndex(rebalance_dates)
+    period = np.searchsorted(dates.values, index.values, side='right') - 1
+    starts = dates.where(dates >= index[0], index[0])
+    # La última fila queda a cero para las filas sin periodo (period == -1)
+    per_period = np.zeros((len(dates) + 1, len(columns)))
+    for history in histories:
+        pos = history.asof_positions(starts) if asof else history.at_positions(starts)
+        per_period[:-1] += history.dense(columns)[pos] / divisor
+    return per_period[period], period >= 0
+
+
+def equity_curves(returns, signals, active, initial_capital):
+    """Curvas de equity de la cartera combinada y de cada estrategia en una sola pasada.
+
+    ``returns`` son los retornos del periodo (fechas × tickers) y ``signals``
+    el histórico ``[(fecha, pesos)]`` de cada estrategia. La combinada
+    rebalancea en las fechas de la primera estrategia activa con los pesos
+    vigentes de todas repartidos a partes iguales; cada estrategia individual
+    usa sus propias fechas y pesos. Devuelve ``(combinada, {estrategia: serie})``.
+    """
+    index, columns = returns.index, returns.columns
+    rets = np.nan_to_num(returns.to_numpy(dtype=float))
+
+    histories = {s: as_history(signals.get(s, [])) for s in active}
+    names = [None]
+    matrices = [weight_matrix(histories[active[0]].dates, index, columns,
+                              [histories[s] for s in active], divisor=len(active))]
+    for s in active:
+        if not histories[s]:
+            continue
+        names.append(s)
+        matrices.append(weight_matrix(histories[s].dates, index, columns, [histories[s]], asof=False))
+
+    weights = np.stack([w for w, _ in matrices])
+    covered = np.stack([m for _, m in matrices])
+    # Retorno de cada cartera y fecha: producto matriz-vector por fila
+    port_rets = np.einsum('kta,ta->kt', weights, rets)
+    growth = np.concatenate([np.full((len(names), 1), float(initial_capital)), 1 + port_rets], axis=1)
+    values = np.cumprod(growth, axis=1)
+
+    curves = {}
+    for k, name in enumerate(names):
+        mask = covered[k]
+        ser = pd.Series(np.concatenate([values[k, :1], values[k, 1:][mask]]),
+                        index=index[:1].append(index[mask]))
+        curves[name] = ser[~ser.index.duplicated(keep='last')].sort_index()
+    combined = curves.pop(None)
+    return combined, curves
@@ -0,0 +1,51 @@
+"""Selección vectorizada de los k mejores activos por fecha.
+
+Los motores eligen cada mes los mejores activos de una lista
+(``sorted(..., reverse=True)[:k]`` o ``max``). :func:`top_k` hace esa
+selección para todas las fechas de una vez sobre la matriz fechas × activos
+de puntuaciones, con ``argpartition`` en lugar de ordenar cada fila. Se
+respeta el orden de las funciones originales: de mayor a menor puntuación y,
+en caso de empate, primero la columna de menor índice (el orden estable de
+``sorted`` y el primero que devuelve ``max``).
+"""
+import numpy as np
+
+
+def top_k(scores, k, weight=None, finite=False):
+    """Los ``k`` mejores activos de cada fila de ``scores`` (fechas × activos).
+
+    Devuelve ``(index, weights)``: ``index`` es una matriz fechas × ``k`` con
+    las columnas elegidas ordenadas de mejor a peor (``-1`` si la fila tiene
+    menos de ``k`` puntuaciones válidas) y ``weights`` una matriz con la forma
+    de ``scores`` con ``weight`` (``1 / k`` por defecto) en las elegidas.
+
+    Los ``NaN`` nunca se eligen; con ``finite=True`` tampoco ``±inf``.
+    """
+    scores = np.asarray(scores, dtype=float)
+    n, m = scores.shape
+    k = min(k, m)
+    weight = 1.0 / k if weight is None and k else weight
+    index = np.full((n, k), -1, dtype=np.int64)
+    weights = np.zeros((n, m))
+    if k == 0 or n == 0:
+        return index, weights
+    valid = np.isfinite(scores) if finite else ~np.isnan(scores)
+    # Clave ascendente: los mejores primero y los inválidos (NaN) al final
+    key = np.where(valid, -scores, np.nan)
+    kth = np.take_along_axis(key, np.argpartition(key, k - 1, axis=1)[:, k - 1:k], axis=1)
+    better = key < kth
+    # Del valor frontera entran los de menor columna hasta completar k
+    tied = key == kth
+    room = k - better.sum(axis=1, keepdims=True)
+    selected = better | (tied & (np.cumsum(tied, axis=1) <= room))
+    # Con menos de k válidos (frontera NaN) entran todos los válidos
+    selected |= np.isnan(kth) & valid
+
+    rows, cols = np.nonzero(selected)
+    slot = np.cumsum(selected, axis=1)[rows, cols] - 1
+    index[rows, slot] = cols
+    # Orden final dentro de las k: estable sobre columnas ya crecientes
+    picked = np.where(index >= 0, np.take_along_axis(key, np.maximum(index, 0), axis=1), np.nan)
+    index = np.take_along_axis(index, np.argsort(picked, axis=1, kind='stable'), axis=1)
+    weights[rows, cols] = weight
+    return index, weights
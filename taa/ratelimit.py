@@ -0,0 +1,93 @@
+"""Cuotas de peticiones por API key persistidas entre reinicios y procesos."""
+import os
+import sqlite3
+import time
+from contextlib import contextmanager
+
+
+class KeyQuota:
+    """Cuotas por API key: un token bucket por minuto y otro por día.
+
+    El estado de los buckets se guarda en un SQLite local, así que los reinicios
+    de Streamlit y las sesiones concurrentes (hilos o procesos) comparten la
+    misma vista de la cuota. ``clock`` debe ser un reloj de pared (se persiste);
+    ``clock`` y ``sleep`` se pueden sustituir por un reloj falso en pruebas.
+    """
+
+    def __init__(self, keys, per_minute, per_day, path, clock=time.time, sleep=time.sleep,
+                 max_wait=120.0):
+        self.keys = list(keys)
+        self.buckets = {"minute": (float(per_minute), per_minute / 60.0),
+                        "day": (float(per_day), per_day / 86400.0)}
+        self.path = path
+        self.clock = clock
+        self.sleep = sleep
+        self.max_wait = max_wait
+        with self._transaction() as con:
+            con.execute("CREATE TABLE IF NOT EXISTS buckets (key TEXT, bucket TEXT, tokens REAL, "
+                        "updated REAL, PRIMARY KEY (key, bucket))")
+
+    @contextmanager
+    def _transaction(self):
+        """Transacción exclusiva de escritura: bloquea a otros procesos entre lectura y escritura"""
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        con = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+        try:
+            con.execute("BEGIN IMMEDIATE")
+            yield con
+            con.execute("COMMIT")
+        except BaseException:
+            con.execute("ROLLBACK")
+            raise
+        finally:
+            con.close()
+
+    def _load(self, con, now):
+        """Tokens actuales de cada key y bucket, ya rellenados hasta ``now``"""
+        rows = {(k, b): (t, u) for k, b, t, u in con.execute("SELECT key, bucket, tokens, updated FROM buckets")}
+        state = {}
+        for key in self.keys:
+            for bucket, (capacity, rate) in self.buckets.items():
+                tokens, updated = rows.get((key, bucket), (capacity, now))
+                state[key, bucket] = min(capacity, tokens + max(0.0, now - updated) * rate)
+        return state
+
+    def _save(self, con, state, now):
+        con.executemany("INSERT OR REPLACE INTO buckets VALUES (?, ?, ?, ?)",
+                        [(k, b, t, now) for (k, b), t in state.items()])
+
+    def _wait_for(self, state, key):
+        """Segundos hasta que ``key`` tenga un token en todos sus buckets"""
+        return max(max(0.0, (1 - state[key, b]) / rate) for b, (_, rate) in self.buckets.items())
+
+    def acquire(self):
+        """Reserva una llamada y devuelve la key a usar.
+
+        Elige la key con más presupuesto diario entre las que tienen token
+        libre; si no hay ninguna, espera al primer token disponible. Devuelve
+        ``None`` si la espera superaría ``max_wait`` (cuota diaria agotada).
+        """
+        while True:
+            with self._transaction() as con:
+                now = self.clock()
+                state = self._load(con, now)
+                waits = {k: self._wait_for(state, k) for k in self.keys}
+                ready = [k for k in self.keys if waits[k] == 0]
+                if ready:
+                    key = max(ready, key=lambda k: state[k, "day"])
+                    for bucket in self.buckets:
+                        state[key, bucket] -= 1
+                    self._save(con, state, now)
+                    return key
+            wait = min(waits.values()) if waits else float("inf")
+            if wait > self.max_wait:
+                return None
+            self.sleep(wait)
+
+    def remaining(self):
+        """Presupuesto restante por key: ``{key: {"minute": n, "day": n}}``"""
+        with self._transaction() as con:
+            state = self._load(con, self.clock())
+        return {k: {b: int(state[k, b]) for b in self.buckets} for k in self.keys}
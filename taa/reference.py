@@ -0,0 +1,217 @@
+"""Puntuaciones escalares originales del dashboard, calculadas para un único símbolo.
+
+Cada función recibe el panel de precios mensuales hasta la fecha de decisión y
+devuelve la puntuación de ``symbol`` en la última fila. Los motores usan las
+versiones vectorizadas de :mod:`taa.momentum`; estas se conservan como
+referencia para comprobar que ambas coinciden. :func:`ret_y_corr_weights` es
+la decisión original de Retorno y Correlación, que el motor usa además si la
+ventana tiene huecos.
+"""
+import calendar
+
+import pandas as pd
+
+
+def momentum_score_keller(df, symbol):
+    """Momentum score para DAA Keller, VAA-12"""
+    if len(df) < 13:
+        return 0
+    try:
+        p0, p1 = df[symbol].iloc[-1], df[symbol].iloc[-2]
+        p3 = df[symbol].iloc[-4]
+        p6 = df[symbol].iloc[-7]
+        p12 = df[symbol].iloc[-13]
+        return 12*(p0/p1) + 4*(p0/p3) + 2*(p0/p6) + (p0/p12) - 19
+    except Exception:
+        return 0
+
+
+def momentum_score_roc4(df, symbol):
+    """Momentum score para Dual Momentum ROC4"""
+    if len(df) < 5:
+        return 0
+    if symbol not in df.columns:
+        return 0
+    if df[symbol].iloc[-5] == 0 or pd.isna(df[symbol].iloc[-5]):
+        return 0
+    if df[symbol].iloc[-5] <= 0:
+        return 0
+    try:
+        result = (df[symbol].iloc[-1] / df[symbol].iloc[-5]) - 1
+        return result
+    except Exception:
+        return 0
+
+
+def momentum_score_accel_dual_mom(df, symbol):
+    """Calcula el ROC promedio de 1, 3 y 6 meses para Accelerated Dual Momentum"""
+    if len(df) < 7:
+        return 0
+    try:
+        p0 = df[symbol].iloc[-1]
+        p1 = df[symbol].iloc[-2]
+        p3 = df[symbol].iloc[-4]
+        p6 = df[symbol].iloc[-7]
+        if p1 <= 0 or p3 <= 0 or p6 <= 0:
+            return 0
+        roc_1 = (p0 / p1) - 1
+        roc_3 = (p0 / p3) - 1
+        roc_6 = (p0 / p6) - 1
+        return (roc_1 + roc_3 + roc_6) / 3
+    except Exception:
+        return 0
+
+
+def roc_12(df, symbol):
+    """Calcula el retorno de 12 meses para Composite Dual Momentum"""
+    if len(df) < 13:
+        return float('-inf')
+    try:
+        p0 = df[symbol].iloc[-1]
+        p12 = df[symbol].iloc[-13]
+        if p12 <= 0:
+            return float('-inf')
+        return (p0 / p12) - 1
+    except Exception:
+        return float('-inf')
+
+
+def roc_3(df, symbol):
+    """Calcula el retorno de 3 meses para Quint Switching Filtered"""
+    if len(df) < 4:
+        return float('-inf')
+    try:
+        p0 = df[symbol].iloc[-1]
+        p3 = df[symbol].iloc[-4]
+        if p3 <= 0:
+            return float('-inf')
+        return (p0 / p3) - 1
+    except Exception:
+        return float('-inf')
+
+
+def roc_6(df, symbol):
+    """Calcula el ROC de 6 meses para Sistema Descorrelación"""
+    if len(df) < 7:
+        return float('-inf')
+    try:
+        p0 = df[symbol].iloc[-1]
+        p6 = df[symbol].iloc[-7]
+        if p6 <= 0:
+            return float('-inf')
+        return (p0 / p6) - 1
+    except Exception:
+        return float('-inf')
+
+
+def sma_12(df, symbol):
+    """Calcula la media móvil simple de 12 meses"""
+    if len(df) < 12:
+        return 0
+    try:
+        prices = df[symbol].iloc[-12:]
+        if prices.isnull().any() or (prices <= 0).any():
+            return 0
+        return prices.mean()
+    except Exception:
+        return 0
+
+
+def momentum_score_13612w(df, symbol):
+    """Calcula el momentum score 13612W"""
+    if len(df) < 13:
+        return 0
+    try:
+        p0 = df[symbol].iloc[-1]
+        p1 = df[symbol].iloc[-2]
+        p3 = df[symbol].iloc[-4]
+        p6 = df[symbol].iloc[-7]
+        p12 = df[symbol].iloc[-13]
+        if p1 <= 0 or p3 <= 0 or p6 <= 0 or p12 <= 0:
+            return 0
+        roc_1 = (p0 / p1) - 1
+        roc_3 = (p0 / p3) - 1
+        roc_6 = (p0 / p6) - 1
+        roc_12 = (p0 / p12) - 1
+        return 12 * roc_1 + 4 * roc_3 + 2 * roc_6 + 1 * roc_12
+    except Exception:
+        return 0
+
+# Nueva función auxiliar para HAA
+def haa_momentum_score(df, symbol):
+    """Calcula el momentum score HAA: media no ponderada de ROC_1M, ROC_3M, ROC_6M, ROC_12M"""
+    if len(df) < 13: # Necesita al menos 13 meses para ROC_12M
+        return float('-inf')
+    try:
+        p0 = df[symbol].iloc[-1]   # Precio actual
+        p1 = df[symbol].iloc[-2]   # Hace 1 mes
+        p3 = df[symbol].iloc[-4]   # Hace 3 meses
+        p6 = df[symbol].iloc[-7]   # Hace 6 meses
+        p12 = df[symbol].iloc[-13] # Hace 12 meses
+        if p1 <= 0 or p3 <= 0 or p6 <= 0 or p12 <= 0:
+            return float('-inf')
+        roc_1 = (p0 / p1) - 1
+        roc_3 = (p0 / p3) - 1
+        roc_6 = (p0 / p6) - 1
+        roc_12 = (p0 / p12) - 1
+        # Media no ponderada
+        score = (roc_1 + roc_3 + roc_6 + roc_12) / 4
+        return score
+    except Exception:
+        return float('-inf')
+
+
+def monthdelta(date, delta):
+    """Función para restar meses a una fecha"""
+    m, y = (date.month + delta) % 12, date.year + ((date.month) + delta - 1) // 12
+    if not m:
+        m = 12
+    d = min(date.day, calendar.monthrange(y, m)[1])
+    return date.replace(day=d, month=m, year=y)
+
+
+def ret_y_corr_weights(df, universe, top_n=6, low_corr_n=3, defensive_assets=("IEF", "BIL")):
+    """Pesos de Retorno y Correlación con datos hasta la última fila de ``df``"""
+    current_date = df.index[-1]
+    start_window = monthdelta(current_date, -6)
+    # Asegurar que start_window no sea antes del inicio de df
+    start_window = max(start_window, df.index[0])
+
+    window_data = df.loc[start_window:current_date]
+
+    if len(window_data) < 2:
+        return {}
+
+    # Filtrar solo los activos del universo disponibles en la ventana
+    available_universe = [a for a in universe if a in window_data.columns]
+    if not available_universe:
+        return {}
+
+    # 1. Top N por rendimiento (6 meses)
+    totreturn = (window_data[available_universe].iloc[-1] / window_data[available_universe].iloc[0]) - 1
+    top_assets = totreturn.nlargest(top_n).dropna()
+
+    # --- Verificación de que los top N son positivos ---
+    if len(top_assets) == top_n and (top_assets > 0).all():
+        # Modo ofensivo: seleccionar los menos correlacionados entre los top N
+        corrMatrix = window_data[top_assets.index].pct_change().dropna().corr()
+        # Evitar problemas con correlaciones NaN
+        corrMatrix = corrMatrix.fillna(0)
+        avg_corr = corrMatrix.mean()
+        selected_assets = avg_corr.nsmallest(low_corr_n).index.tolist()
+
+        # Pesos iguales para los activos seleccionados
+        w = {}
+        if selected_assets:
+            weight = 1.0 / len(selected_assets)
+            for asset in selected_assets:
+                w[asset] = weight
+        return w
+    # Modo defensivo: seleccionar el mejor activo defensivo
+    defensivos_validos = totreturn[list(defensive_assets)].dropna()
+    if defensivos_validos.empty:
+        return {}
+    best_def = defensivos_validos.idxmax()
+    if pd.isna(best_def):
+        return {}
+    return {best_def: 1.0}
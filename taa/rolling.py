@@ -0,0 +1,90 @@
+"""Estadísticos de rentabilidades en ventanas móviles a partir de sumas acumuladas.
+
+:class:`RollingMoments` guarda, para todo el universo, las sumas acumuladas
+de las rentabilidades mensuales ``r_t = p_t / p_{t-1} - 1`` y de sus
+cuadrados. Los productos cruzados se acumulan por pares la primera vez que se
+piden y se reutilizan después. Con ello la matriz de correlaciones de
+cualquier subconjunto en cualquier ventana se lee en O(N²), restando dos
+filas, sin volver a tocar los precios.
+"""
+import numpy as np
+
+_EPS = np.finfo(float).eps
+
+
+def _prefix(values):
+    """Sumas acumuladas con una fila de ceros delante: ``out[t] = values[:t].sum(0)``"""
+    out = np.zeros((len(values) + 1,) + values.shape[1:])
+    np.cumsum(values, axis=0, out=out[1:])
+    return out
+
+
+class RollingMoments:
+    """Sumas acumuladas de rentabilidades de un panel de precios (filas × activos).
+
+    Una ventana ``(lo, hi)`` son las filas de precios ``lo..hi``, es decir,
+    las ``hi - lo`` rentabilidades de las filas ``lo + 1..hi`` (lo mismo que
+    ``pct_change().dropna()`` sobre ese tramo). Las rentabilidades no finitas
+    cuentan como cero en las sumas y se registran aparte para que el llamante
+    pueda detectarlas con :meth:`finite`.
+    """
+
+    def __init__(self, values):
+        values = np.asarray(values, dtype=float)
+        returns = np.full(values.shape, np.nan)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            returns[1:] = values[1:] / values[:-1] - 1
+        bad = ~np.isfinite(returns)
+        bad[0] = False
+        returns = np.where(np.isfinite(returns), returns, 0.0)
+        # Las sumas se acumulan sobre rentabilidades centradas en la media de cada
+        # activo: varianzas y covarianzas no cambian con el desplazamiento y la
+        # resta de sumas de cuadrados ya no cancela la parte de la media
+        # (la fila 0 no tiene rentabilidad y se queda en cero)
+        self._mean = returns[1:].mean(axis=0) if len(returns) > 1 else np.zeros(returns.shape[1:])
+        returns[1:] -= self._mean
+        self.returns = returns
+        self._sum = _prefix(self.returns)
+        self._sq = _prefix(self.returns ** 2)
+        self._bad = _prefix(bad.astype(np.int64))
+        # Productos cruzados acumulados por par (i < j), calculados bajo demanda
+        self._cross = {}
+
+    def finite(self, cols, lo, hi):
+        """``True`` si todas las rentabilidades de ``cols`` en la ventana son finitas"""
+        return not (self._bad[hi + 1, cols] - self._bad[lo + 1, cols]).any()
+
+    def _cross_sums(self, pairs, lo, hi):
+        missing = [p for p in pairs if p not in self._cross]
+        if missing:
+            i, j = np.array(missing).T
+            prefix = _prefix(self.returns[:, i] * self.returns[:, j])
+            for k, pair in enumerate(missing):
+                self._cross[pair] = prefix[:, k]
+        return np.array([self._cross[p][hi + 1] - self._cross[p][lo + 1] for p in pairs])
+
+    def corr(self, cols, lo, hi):
+        """Matriz de correlaciones de Pearson de ``cols`` en la ventana ``(lo, hi)``.
+
+        Igual que ``DataFrame.corr()``: ``NaN`` si algún activo tiene varianza
+        cero o hay menos de dos rentabilidades.
+        """
+        cols = list(cols)
+        k, n = len(cols), hi - lo
+        out = np.full((k, k), np.nan)
+        if n < 2 or k == 0:
+            return out
+        sx = self._sum[hi + 1, cols] - self._sum[lo + 1, cols]
+        sq = self._sq[hi + 1, cols] - self._sq[lo + 1, cols]
+        var = sq - sx * sx / n
+        iu, ju = np.triu_indices(k, 1)
+        pairs = [(min(cols[a], cols[b]), max(cols[a], cols[b])) for a, b in zip(iu, ju)]
+        cov = self._cross_sums(pairs, lo, hi) - sx[iu] * sx[ju] / n if pairs else np.empty(0)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            # Por debajo del error de redondeo de las propias rentabilidades (relativo
+            # a su suma de cuadrados sin centrar), la varianza es cero
+            mean = self._mean[cols]
+            ok = var > _EPS * n * (sq + 2 * mean * sx + n * mean * mean)
+            out[iu, ju] = out[ju, iu] = np.where(ok[iu] & ok[ju], cov / np.sqrt(var[iu] * var[ju]), np.nan)
+        out[np.diag_indices(k)] = np.where(ok, 1.0, np.nan)
+        return np.clip(out, -1.0, 1.0)
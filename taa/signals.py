@@ -0,0 +1,170 @@
+"""Históricos de señales indexados por fecha.
+
+Un histórico es la lista ordenada de señales ``(fecha, pesos)`` de una
+estrategia. Las fechas se guardan en un índice ordenado y las búsquedas se
+resuelven con ``searchsorted``, así que localizar la señal vigente en N
+fechas cuesta O(N log S) en lugar de recorrer la lista en cada periodo.
+
+Para guardar y mostrar logs de señales, :class:`SignalMatrix` los compacta en
+una matriz densa fechas × tickers en lugar de miles de diccionarios.
+"""
+import numpy as np
+import pandas as pd
+
+
+class SignalHistory:
+    """Señales ``(fecha, pesos)`` con búsquedas exactas y as-of por fecha.
+
+    Se comporta como la lista original (iterable, ``len``, valor booleano),
+    así que puede sustituirla donde solo se recorren las señales.
+    """
+
+    def __init__(self, signals=()):
+        signals = list(signals)
+        dates = pd.DatetimeIndex([d for d, _ in signals])
+        # Orden estable: entre fechas repetidas se conserva el orden original
+        order = np.argsort(dates.values, kind='stable')
+        self.dates = dates[order]
+        self.weights = [signals[i][1] for i in order]
+        self._nonempty = np.array([bool(w) for w in self.weights], dtype=bool)
+        self._dense = {}
+
+    def __len__(self):
+        return len(self.weights)
+
+    def __iter__(self):
+        return iter(zip(self.dates, self.weights))
+
+    def __getitem__(self, i):
+        return self.dates[i], self.weights[i]
+
+    def between(self, start, end):
+        """Sub-histórico con las señales en ``[start, end]``"""
+        lo = self.dates.searchsorted(pd.Timestamp(start), side='left')
+        hi = self.dates.searchsorted(pd.Timestamp(end), side='right')
+        return SignalHistory(zip(self.dates[lo:hi], self.weights[lo:hi]))
+
+    def at_positions(self, dates):
+        """Posición de la señal de cada fecha exacta (la última si se repite), -1 si no hay"""
+        query = pd.DatetimeIndex(dates).values
+        pos = np.searchsorted(self.dates.values, query, side='right') - 1
+        found = pos >= 0
+        found[found] = self.dates.values[pos[found]] == query[found]
+        return np.where(found, pos, -1)
+
+    def asof_positions(self, dates):
+        """Posición de la señal vigente en cada fecha, -1 si no hay.
+
+        Si hay una señal no vacía en la fecha exacta se usa esa; si no, la
+        última señal con fecha anterior o igual.
+        """
+        query = pd.DatetimeIndex(dates).values
+        left = np.searchsorted(self.dates.values, query, side='left')
+        last = np.searchsorted(self.dates.values, query, side='right') - 1
+        exact = left < len(self)
+        exact[exact] = (self.dates.values[left[exact]] == query[exact]) & self._nonempty[left[exact]]
+        return np.where(exact, left, last)
+
+    def at(self, date):
+        """Pesos de la señal de ``date`` exactamente, ``{}`` si no hay"""
+        pos = self.at_positions([date])[0]
+        return self.weights[pos] if pos >= 0 else {}
+
+    def asof(self, date):
+        """Pesos vigentes en ``date`` (semántica de :meth:`asof_positions`)"""
+        pos = self.asof_positions([date])[0]
+        return self.weights[pos] if pos >= 0 else {}
+
+    def dense(self, columns):
+        """Matriz señales × ``columns`` con una fila extra de ceros para la posición -1"""
+        key = tuple(columns)
+        if key not in self._dense:
+            pos = {c: j for j, c in enumerate(columns)}
+            out = np.zeros((len(self) + 1, len(columns)))
+            for i, weights in enumerate(self.weights):
+                for ticker, weight in weights.items():
+                    j = pos.get(ticker)
+                    if j is not None:
+                        out[i, j] += weight
+            self._dense[key] = out
+        return self._dense[key]
+
+
+class SignalMatrix:
+    """Señales ``(fecha, pesos)`` como matriz densa fechas × tickers (float32 por defecto).
+
+    ``weights[i, j]`` es el peso de ``tickers[j]`` en la señal ``i`` y
+    ``order[i, j]`` su posición en el diccionario original (-1 si no
+    aparece), así que cada fila se reconstruye con las mismas claves y el
+    mismo orden. Las matrices de una misma estrategia comparten el índice de
+    tickers. Se comporta como la lista original: iterable, ``len``, índices
+    y cortes.
+    """
+
+    def __init__(self, dates, tickers, weights, order):
+        self.dates = pd.DatetimeIndex(dates)
+        self.tickers = tickers if isinstance(tickers, pd.Index) else pd.Index(tickers)
+        self.weights = weights
+        self.order = order
+
+    @classmethod
+    def from_signals(cls, signals, tickers=None, dtype=np.float32):
+        """Matriz a partir de ``[(fecha, pesos)]``; ``tickers`` fija (y comparte) las columnas"""
+        signals = list(signals)
+        if tickers is None:
+            tickers = list(dict.fromkeys(t for _, w in signals for t in w))
+        if not isinstance(tickers, pd.Index):
+            tickers = pd.Index(tickers)
+        extra = [t for _, w in signals for t in w if t not in tickers]
+        if extra:
+            tickers = tickers.append(pd.Index(list(dict.fromkeys(extra))))
+        pos = {t: j for j, t in enumerate(tickers)}
+        weights = np.zeros((len(signals), len(tickers)), dtype=dtype)
+        order = np.full((len(signals), len(tickers)), -1, dtype=np.int8 if len(tickers) < 128 else np.int16)
+        for i, (_, w) in enumerate(signals):
+            for k, (ticker, weight) in enumerate(w.items()):
+                weights[i, pos[ticker]] = weight
+                order[i, pos[ticker]] = k
+        return cls([d for d, _ in signals], tickers, weights, order)
+
+    def __len__(self):
+        return len(self.dates)
+
+    def __bool__(self):
+        return len(self) > 0
+
+    def __iter__(self):
+        return (self[i] for i in range(len(self)))
+
+    def __getitem__(self, i):
+        if isinstance(i, slice):
+            return SignalMatrix(self.dates[i], self.tickers, self.weights[i], self.order[i])
+        return self.dates[i], self.row(i)
+
+    def row(self, i):
+        """Pesos de la señal ``i`` como diccionario, en el orden original"""
+        cols = np.flatnonzero(self.order[i] >= 0)
+        cols = cols[np.argsort(self.order[i, cols])]
+        return {self.tickers[j]: float(self.weights[i, j]) for j in cols}
+
+    def nonempty(self):
+        """Máscara de las señales con algún ticker"""
+        return (self.order >= 0).any(axis=1)
+
+    def to_frame(self):
+        """Formato largo (fecha, ticker, peso); una señal vacía es una fila sin ticker"""
+        rows, cols = np.nonzero(self.order >= 0)
+        empty = np.flatnonzero(~self.nonempty())
+        # Por señal y, dentro de cada una, en el orden original
+        rank = np.concatenate([self.order[rows, cols], np.zeros(len(empty), dtype=self.order.dtype)])
+        rows = np.concatenate([rows, empty])
+        keep = np.lexsort((rank, rows))
+        rows, cols = rows[keep], np.concatenate([cols, np.full(len(empty), -1)])[keep]
+        tickers = np.append(self.tickers.to_numpy(dtype=object), "")
+        weights = np.append(self.weights, np.full((len(self), 1), np.nan, dtype=self.weights.dtype), axis=1)
+        return pd.DataFrame({"date": self.dates[rows], "ticker": tickers[cols], "weight": weights[rows, cols]})
+
+
+def as_history(signals):
+    """Envuelve una lista de señales en :class:`SignalHistory` si no lo es ya"""
+    return signals if isinstance(signals, SignalHistory) else SignalHistory(signals)
@@ -0,0 +1,287 @@
+"""Snapshot nocturno de señales, curvas y métricas de todas las estrategias.
+
+Los precios solo cambian una vez al día (workflow ``update_csv.yml``), así que
+el mismo workflow ejecuta después::
+
+    python -m taa.snapshot
+
+que calcula sobre toda la historia del almacén ``data/prices.parquet``:
+
+* ``monthly.parquet``: el panel mensual alineado (fechas × tickers);
+* ``decisions.parquet``: las decisiones por fila de cada estrategia, en
+  formato largo (estrategia, fecha, ticker, peso);
+* ``curves.parquet``: la curva de equity (base 1) de cada estrategia y de la
+  combinada de todas;
+* ``manifest.json``: versión de los datos, último dato y métricas.
+
+Las señales son causales y cada decisión solo mira ``warmup`` filas atrás, así
+que cualquier rango que termine en el último dato es un corte del snapshot:
+el dashboard toma de aquí el panel y las decisiones en lugar de descargar y
+recalcular, y solo rehace las curvas (milisegundos) para su capital y fechas.
+
+Por lo mismo, el snapshot se actualiza de forma incremental: si el anterior
+tiene otra versión de datos, se compara fila a fila (hash) su panel mensual
+con el nuevo, se conservan las decisiones de las filas que no han cambiado y
+solo se calculan las siguientes, con las ``warmup`` filas previas como estado.
+Un refresco diario cuesta así uno o dos meses de cálculo sea cual sea la
+historia; ``--full`` fuerza el recálculo completo.
+"""
+import argparse
+import json
+import os
+import tempfile
+from datetime import datetime, timezone
+
+import numpy as np
+import pandas as pd
+
+from taa import config
+from taa.features import FeatureStore, data_version
+from taa.metrics import calc_metrics
+from taa.panel import source_stamp
+from taa.parallel import StrategyPool
+from taa.portfolio import equity_curves
+from taa.store import DATA_DIR, read_price_store, store_path
+from taa.strategies import STRATEGY_REGISTRY, shift_decisions
+
+SNAPSHOT_DIR = os.path.join(DATA_DIR, "snapshot")
+MANIFEST = "manifest.json"
+# 2: el manifiesto incluye "rows_computed" (actualización incremental)
+FORMAT_VERSION = 2
+# Nombre de la curva de la cartera combinada con todas las estrategias
+COMBINED = "Combinada"
+
+
+def monthly_panel(daily):
+    """Panel mensual alineado a partir de precios diarios (mismo criterio que el dashboard)"""
+    monthly = daily.resample('ME').last()
+    return monthly.dropna(axis=1, how='all').ffill().bfill().dropna(how='all')
+
+
+def changed_from(previous, panel):
+    """Primera fila de ``panel`` que difiere del panel de ``previous`` (``len(panel)`` si ninguna)"""
+    old = previous["prices"]
+    if list(old.columns) != list(panel.columns):
+        return 0
+    n = min(len(old), len(panel))
+    same = (pd.util.hash_pandas_object(old.iloc[:n], index=True).to_numpy()
+            == pd.util.hash_pandas_object(panel.iloc[:n], index=True).to_numpy())
+    return n if same.all() else int(np.argmin(same))
+
+
+def _reusable(previous, name):
+    """``True`` si ``previous`` tiene la historia de ``name`` con el mismo calentamiento y desfase"""
+    info = previous["manifest"]["strategies"].get(name) if previous is not None else None
+    spec = STRATEGY_REGISTRY[name]
+    return info is not None and info["warmup"] == spec["warmup"] and info["lag"] == spec["lag"]
+
+
+def update_decisions(panel, names, previous=None, pool=None):
+    """Decisiones de ``names`` sobre ``panel`` reutilizando las de ``previous`` cuando se puede.
+
+    Devuelve ``(decisiones, filas)``, con ``filas`` el número de filas del
+    panel que se han tenido que calcular (las nuevas o cambiadas).
+    """
+    pool = pool or StrategyPool(1)
+    incremental = [n for n in names if _reusable(previous, n)]
+    full = [n for n in names if n not in incremental]
+    decisions = pool.evaluate(full, panel, FeatureStore()) if full else {}
+    start = changed_from(previous, panel) if incremental else len(panel)
+    if incremental and start < len(panel):
+        # Las filas previas a ``start`` no cambian: basta con las nuevas y su calentamiento
+        warmup = max(STRATEGY_REGISTRY[n]["warmup"] for n in incremental)
+        first = panel.index[start]
+        tail = pool.evaluate(incremental, panel.iloc[max(0, start - warmup):], FeatureStore())
+        for n in incremental:
+            kept = [(d, w) for d, w in previous["decisions"][n] if d < first]
+            decisions[n] = kept + [(d, w) for d, w in tail[n] if d >= first]
+    else:
+        for n in incremental:
+            decisions[n] = [(d, w) for d, w in previous["decisions"][n] if d <= panel.index[-1]]
+    rows = len(panel) if full else len(panel) - start
+    return {n: decisions[n] for n in names}, rows
+
+
+def build_snapshot(daily, names=None, workers=1, previous=None):
+    """Calcula el snapshot de ``names`` (todas las registradas por defecto) sobre ``daily``.
+
+    Con ``previous`` (el snapshot anterior) solo se calculan las filas del
+    panel mensual que han cambiado; con ``workers > 1`` las estrategias se
+    calculan en paralelo en procesos.
+    """
+    names = list(names or STRATEGY_REGISTRY)
+    names = [n for n in names if all(t in daily.columns for t in STRATEGY_REGISTRY[n]["tickers"])]
+    panel = monthly_panel(daily)
+    pool = StrategyPool(workers)
+    try:
+        decisions, rows = update_decisions(panel, names, previous, pool)
+    finally:
+        pool.close()
+
+    histories = {n: shift_decisions(decisions[n], panel.index, STRATEGY_REGISTRY[n]["lag"]) for n in names}
+    returns = panel.pct_change().fillna(0)
+    combined, curves = equity_curves(returns, histories, names, 1.0)
+    curves = pd.DataFrame({**curves, COMBINED: combined})
+
+    manifest = {
+        "format": FORMAT_VERSION,
+        "created": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "data_version": data_version(daily),
+        "data_last": f"{daily.index.max():%Y-%m-%d}",
+        "strategies": {
+            n: {
+                "warmup": STRATEGY_REGISTRY[n]["warmup"],
+                "lag": STRATEGY_REGISTRY[n]["lag"],
+                "first_decision": f"{decisions[n][0][0]:%Y-%m-%d}" if decisions[n] else None,
+                "metrics": calc_metrics(curves[n].dropna().pct_change().dropna()),
+            }
+            for n in names
+        },
+        "combined_metrics": calc_metrics(curves[COMBINED].dropna().pct_change().dropna()),
+        "rows_computed": rows,
+    }
+    return {"manifest": manifest, "prices": panel, "decisions": decisions, "curves": curves}
+
+
+def _decisions_frame(decisions):
+    """Decisiones en formato largo; una decisión vacía se guarda como fila sin ticker"""
+    rows = []
+    for name, items in decisions.items():
+        for date, weights in items:
+            if not weights:
+                rows.append((name, date, "", np.nan))
+            rows.extend((name, date, t, float(w)) for t, w in weights.items())
+    return pd.DataFrame(rows, columns=["strategy", "date", "ticker", "weight"])
+
+
+def _decisions_from_frame(frame):
+    decisions = {}
+    for name, date, ticker, weight in zip(frame["strategy"], frame["date"], frame["ticker"], frame["weight"]):
+        items = decisions.setdefault(name, [])
+        if not items or items[-1][0] != date:
+            items.append((date, {}))
+        if ticker:
+            items[-1][1][ticker] = weight
+    return decisions
+
+
+def _replace_file(path, write):
+    """Escribe ``path`` con ``write(tmp)`` sobre un temporal único del mismo directorio y lo sustituye"""
+    fd, tmp = tempfile.mkstemp(dir=os.path.dirname(path) or ".", suffix=".tmp")
+    os.close(fd)
+    try:
+        os.chmod(tmp, 0o644)
+        write(tmp)
+        os.replace(tmp, path)
+    except BaseException:
+        if os.path.exists(tmp):
+            os.remove(tmp)
+        raise
+
+
+def _write_json(data):
+    def write(path):
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(data, f, ensure_ascii=False, indent=1)
+    return write
+
+
+def write_snapshot(snapshot, directory=SNAPSHOT_DIR):
+    """Escribe el snapshot; el manifiesto va el último para que nunca apunte a ficheros a medias"""
+    os.makedirs(directory, exist_ok=True)
+    tables = {
+        "monthly.parquet": snapshot["prices"].rename_axis("Date"),
+        "decisions.parquet": _decisions_frame(snapshot["decisions"]),
+        "curves.parquet": snapshot["curves"].rename_axis("Date"),
+    }
+    for filename, table in tables.items():
+        _replace_file(os.path.join(directory, filename), lambda tmp, table=table: table.to_parquet(tmp, compression="zstd"))
+    _replace_file(os.path.join(directory, MANIFEST), _write_json(snapshot["manifest"]))
+
+
+def snapshot_stamp(directory=SNAPSHOT_DIR):
+    """Marca del manifiesto (se escribe el último): cambia con cada snapshot nuevo"""
+    return source_stamp(os.path.join(directory, MANIFEST))
+
+
+def read_snapshot(directory=SNAPSHOT_DIR):
+    """Snapshot guardado en ``directory`` o ``None`` si no existe o no se puede leer"""
+    try:
+        with open(os.path.join(directory, MANIFEST), encoding="utf-8") as f:
+            manifest = json.load(f)
+        if manifest.get("format") != FORMAT_VERSION:
+            return None
+        prices = pd.read_parquet(os.path.join(directory, "monthly.parquet")).rename_axis(None)
+        decisions = _decisions_from_frame(pd.read_parquet(os.path.join(directory, "decisions.parquet")))
+        curves = pd.read_parquet(os.path.join(directory, "curves.parquet")).rename_axis(None)
+    except (OSError, ValueError, KeyError):
+        return None
+    for name in manifest["strategies"]:
+        decisions.setdefault(name, [])
+    return {"manifest": manifest, "prices": prices, "decisions": decisions, "curves": curves}
+
+
+def snapshot_serves(snapshot, names, tickers, end, store_version):
+    """``True`` si el snapshot reproduce una ejecución de ``names`` que llega hasta ``end``.
+
+    Hace falta que se calculara sobre los mismos datos (``store_version``),
+    que incluya las estrategias y tickers pedidos y que la descarga en vivo
+    llegara hasta su último dato.
+    """
+    if snapshot is None:
+        return False
+    manifest = snapshot["manifest"]
+    return (manifest["data_version"] == store_version
+            and all(n in manifest["strategies"] for n in names)
+            and all(t in snapshot["prices"].columns for t in tickers)
+            and pd.Timestamp(end) >= pd.Timestamp(manifest["data_last"]))
+
+
+def snapshot_prices(snapshot, tickers, start):
+    """Panel mensual de ``tickers`` desde ``start``, igual al que montaría la descarga en vivo"""
+    prices = snapshot["prices"]
+    return prices.loc[prices.index >= pd.Timestamp(start), list(tickers)]
+
+
+def snapshot_decisions(snapshot, name, index):
+    """Decisiones de ``name`` que una ejecución en vivo sobre ``index`` habría producido.
+
+    La primera decisión en vivo cae en la fila ``warmup`` del panel recortado;
+    las posteriores coinciden con las de la historia completa.
+    """
+    warmup = snapshot["manifest"]["strategies"][name]["warmup"]
+    if len(index) <= warmup:
+        return []
+    first, last = index[warmup], index[-1]
+    return [(d, w) for d, w in snapshot["decisions"][name] if first <= d <= last]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Genera el snapshot nocturno de señales")
+    parser.add_argument("--store", default=store_path(), help="almacén Parquet de precios diarios")
+    parser.add_argument("--out", default=SNAPSHOT_DIR, help="directorio de salida")
+    parser.add_argument("--workers", type=int, default=config.STRATEGY_WORKERS,
+                        help="procesos para calcular las estrategias")
+    parser.add_argument("--full", action="store_true", help="recalcular toda la historia")
+    args = parser.parse_args(argv)
+
+    daily = read_price_store(args.store)
+    if daily.empty:
+        parser.error(f"almacén vacío o inexistente: {args.store}")
+    previous = None if args.full else read_snapshot(args.out)
+    if (previous is not None and previous["manifest"]["data_version"] == data_version(daily)
+            and all(_reusable(previous, n) for n in STRATEGY_REGISTRY)):
+        print(f"✅ Snapshot al día (datos hasta {previous['manifest']['data_last']}) en {args.out}")
+        return
+    snapshot = build_snapshot(daily, workers=args.workers, previous=previous)
+    write_snapshot(snapshot, args.out)
+    manifest = snapshot["manifest"]
+    print(f"📦 Snapshot de {len(manifest['strategies'])} estrategias hasta {manifest['data_last']} en {args.out} "
+          f"({manifest['rows_computed']} de {len(snapshot['prices'])} meses calculados)")
+    for name, info in manifest["strategies"].items():
+        m = info["metrics"]
+        print(f"   {name}: CAGR {m['CAGR']} % · MaxDD {m['MaxDD']} % · Sharpe {m['Sharpe']}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,150 @@
+"""Almacén local de precios en Parquet.
+
+``data/prices.parquet`` guarda en formato columnar el precio ajustado diario de
+todos los tickers (fechas × tickers). Lo escribe ``update_csv.py`` junto a los
+CSV, así que el dashboard puede arrancar con una única lectura local en lugar
+de descargar y parsear cada CSV.
+"""
+import io
+import os
+import re
+import tempfile
+import threading
+from contextlib import contextmanager
+
+import pandas as pd
+import pyarrow.parquet as pq
+
+try:
+    import fcntl
+except ImportError:  # Windows: solo bloqueo entre hilos
+    fcntl = None
+
+DATA_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "data")
+STORE_FILE = "prices.parquet"
+# Columnas de datos de los CSV (Price = cierre ajustado)
+BAR_COLUMNS = ["Price", "Close", "High", "Low", "Open", "Volume"]
+
+# Serializa las escrituras del almacén entre hilos; entre procesos, ``_locked``
+_WRITE_LOCK = threading.Lock()
+
+# Primera línea de datos: empieza por una fecha ISO
+_FIRST_ROW = re.compile(r"^\d{4}-\d{2}-\d{2}", re.M)
+
+
+def store_path(data_dir=DATA_DIR):
+    """Ruta del almacén dentro de ``data_dir``"""
+    return os.path.join(data_dir, STORE_FILE)
+
+
+def csv_path(ticker, data_dir=DATA_DIR):
+    """Ruta del CSV incluido en el repo para ``ticker``"""
+    return os.path.join(data_dir, f"{ticker}.csv")
+
+
+def read_price_store(path=None, tickers=None):
+    """Lee el almacén (solo las columnas de ``tickers`` si se indican); vacío si no existe"""
+    path = path or store_path()
+    if not os.path.exists(path):
+        return pd.DataFrame()
+    if tickers is not None:
+        available = set(pq.read_schema(path).names)  # solo metadatos, sin leer datos
+        tickers = [t for t in tickers if t in available]
+    return pd.read_parquet(path, columns=tickers)
+
+
+def write_price_store(prices, path=None):
+    """Fusiona ``prices`` (fechas × tickers) con el almacén y lo reescribe de forma atómica.
+
+    Las columnas nuevas sustituyen a las existentes; los tickers que no vienen
+    en ``prices`` conservan sus datos anteriores.
+    """
+    path = path or store_path()
+    with _locked(path):
+        prices = pd.DataFrame(prices).astype(float)
+        current = read_price_store(path)
+        if not current.empty:
+            keep = current.drop(columns=[c for c in prices.columns if c in current.columns])
+            prices = pd.concat([keep, prices], axis=1)
+        return _replace_store(prices, path)
+
+
+def append_price_store(rows, path=None):
+    """Añade filas nuevas (fechas × tickers) al almacén sin tocar el resto de la historia.
+
+    En las fechas que ya existían prevalecen los valores de ``rows``.
+    """
+    path = path or store_path()
+    with _locked(path):
+        rows = pd.DataFrame(rows).astype(float)
+        return _replace_store(rows.combine_first(read_price_store(path)), path)
+
+
+@contextmanager
+def _locked(path):
+    """Bloqueo exclusivo del almacén ``path`` entre hilos y entre procesos"""
+    with _WRITE_LOCK:
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        with open(f"{path}.lock", "a") as handle:
+            if fcntl is not None:
+                fcntl.flock(handle, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                if fcntl is not None:
+                    fcntl.flock(handle, fcntl.LOCK_UN)
+
+
+def _replace_store(prices, path):
+    prices = prices.sort_index()
+    prices = prices[sorted(prices.columns)]
+    prices.index = pd.DatetimeIndex(prices.index, name="Date")
+    # Temporal único en el mismo directorio: os.replace es atómico y nadie pisa el nuestro
+    fd, tmp = tempfile.mkstemp(dir=os.path.dirname(path) or ".", suffix=".tmp")
+    os.close(fd)
+    try:
+        os.chmod(tmp, 0o644)
+        prices.to_parquet(tmp, compression="zstd")
+        os.replace(tmp, path)
+    except BaseException:
+        if os.path.exists(tmp):
+            os.remove(tmp)
+        raise
+    return prices
+
+
+def read_price_csv(text, ticker):
+    """Serie de precio ajustado (columna ``Price``) de un CSV con el formato de ``update_csv.py``.
+
+    Las filas de cabecera (``Price``/``Ticker``/``Date``) se saltan de una vez y
+    las columnas de fecha y precio se parsean en bloque. Devuelve un DataFrame
+    con una columna ``ticker``, vacío si no hay filas de datos.
+    """
+    # mismo conversor que pd.to_numeric (series idénticas al parser anterior)
+    df = _read_csv_rows(text, usecols=[0, 1], names=["Date", ticker], precision="high")
+    if df is None:
+        return pd.DataFrame()
+    if df[ticker].dtype != float:
+        df[ticker] = pd.to_numeric(df[ticker], errors="coerce")
+    return df
+
+
+def read_bars_csv(text):
+    """Todas las columnas (``BAR_COLUMNS``) de un CSV con el formato de ``update_csv.py``.
+
+    Los valores se leen sin pérdida (``round_trip``): reescribirlos reproduce el fichero.
+    """
+    df = _read_csv_rows(text, usecols=range(len(BAR_COLUMNS) + 1), names=["Date"] + BAR_COLUMNS,
+                        precision="round_trip")
+    return df if df is not None else pd.DataFrame(columns=BAR_COLUMNS)
+
+
+def _read_csv_rows(text, usecols, names, precision):
+    """Filas de datos indexadas por fecha, saltando la cabecera; ``None`` si no hay"""
+    first = _FIRST_ROW.search(text)
+    if first is None:
+        return None
+    df = pd.read_csv(io.StringIO(text), skiprows=text.count("\n", 0, first.start()), header=None,
+                     usecols=usecols, names=names, index_col=0, float_precision=precision)
+    df.index = pd.to_datetime(df.index, format="ISO8601", errors="coerce")
+    return df[df.index.notna()].rename_axis(None)
@@ -0,0 +1,555 @@
+"""Estrategias TAA: configuración, motores de señales y registro.
+
+Cada motor ``weights_*`` recibe el panel de precios mensuales y devuelve la
+lista de señales ``(fecha, pesos)``; con ``decisions=True`` devuelve una
+decisión por fila. El registro describe cada estrategia (parámetros, tickers,
+calentamiento y desfase) para que el runner no dependa de cadenas if/elif.
+"""
+import numpy as np
+import pandas as pd
+
+from taa.features import FeatureStore
+from taa.momentum import (keller_scores, roc4_scores, accel_dual_mom_scores, roc_scores,
+                          sma_scores, momentum_13612w_scores, haa_scores)
+from taa.ranking import top_k
+from taa.reference import monthdelta, ret_y_corr_weights
+
+# ------------- CONFIGURACIÓN -------------
+# Actualización: VGK -> IEV en todas las estrategias
+DAA_KELLER = {
+    "risky":   ['SPY','IWM','QQQ','IEV','EWJ','EEM','VNQ','DBC','GLD','TLT','HYG','LQD'], # VGK -> IEV
+    "protect": ['SHY','IEF','LQD'],
+    "canary":  ['EEM','AGG']
+}
+DUAL_ROC4 = {
+    "universe":['SPY','IWM','QQQ','IEV','EWJ','EEM','VNQ','DBC','GLD','TLT','HYG','LQD','IEF'], # VGK -> IEV
+    "fill":    ['IEF','TLT','SHY']
+}
+ACCEL_DUAL_MOM = {
+    "equity": ['SPY', 'IEV'], # VGK -> IEV
+    "protective": ['TLT', 'IEF', 'SHY', 'TIP']
+}
+VAA_12 = {
+    "risky": ['SPY', 'IWM', 'QQQ', 'IEV', 'EWJ', 'EEM', 'VNQ', 'DBC', 'GLD', 'TLT', 'LQD', 'HYG'], # VGK -> IEV
+    "safe": ['IEF', 'LQD', 'BIL']
+}
+# Nueva estrategia
+COMPOSITE_DUAL_MOM = {
+    "slices": {
+        "Equities": ['SPY', 'EFA'],
+        "Bonds": ['HYG', 'LQD'],
+        "Real_Estate": ['VNQ', 'IYR'],
+        "Stress": ['GLD', 'TLT']
+    },
+    "benchmark": 'BIL' # Activo de referencia para comparar rendimiento mínimo
+}
+# Nueva estrategia
+QUINT_SWITCHING_FILTERED = {
+    "risky": ['SPY', 'QQQ', 'EFA', 'EEM', 'TLT'],
+    "defensive": ['IEF', 'BIL']
+}
+# Nueva estrategia
+BAA_AGGRESSIVE = {
+    "offensive": ['QQQ', 'EEM', 'EFA', 'AGG'],
+    "defensive": ['TIP', 'DBC', 'BIL', 'IEF', 'TLT', 'LQD', 'AGG'],
+    "canary": ['SPY', 'EEM', 'EFA', 'AGG']
+}
+# Nueva estrategia
+SISTEMA_DESCORRELACION = {
+    "main": ['VTI', 'GLD', 'TLT'],
+    "secondary": ['SPY', 'QQQ', 'MDY', 'EFA']
+}
+# Nueva estrategia: HAA (Hybrid Adaptive Asset Allocation)
+HAA = {
+    "offensive_universe": ['SPY', 'IWM', 'EFA', 'EEM', 'VNQ', 'DBC', 'IEF', 'TLT'],
+    "canary": ['TIP'],
+    "cash_proxy_candidates": ['IEF', 'BIL'] # Para representar efectivo y alternativas defensivas
+}
+# Nueva estrategia: Retorno y Correlación
+RET_Y_CORR = {
+    "universe": ["QQQ", "SPY", "VNQ", "BIL", "IEF", "TLT", "TIP", "IEV",
+          "EWJ", "EFA", "EEM", "DBC", "GLD", "IWM"],
+    "top_n": 6,            # Top N por rendimiento
+    "low_corr_n": 3        # N ETFs menos correlacionados
+}
+
+ALL_STRATEGIES = {
+    "DAA KELLER": DAA_KELLER,
+    "Dual Momentum ROC4": DUAL_ROC4,
+    "Accelerated Dual Momentum": ACCEL_DUAL_MOM,
+    "VAA-12": VAA_12,
+    "Composite Dual Momentum": COMPOSITE_DUAL_MOM,
+    "Quint Switching Filtered": QUINT_SWITCHING_FILTERED,
+    "BAA Aggressive": BAA_AGGRESSIVE,
+    "Sistema Descorrelación": SISTEMA_DESCORRELACION,
+    "HAA": HAA, # Añadida la nueva estrategia
+    "Retorno y Correlación": RET_Y_CORR # Añadida la nueva estrategia
+}
+
+# Los motores leen los paneles vectorizados de taa.momentum; las puntuaciones
+# escalares originales se conservan como referencia en taa.reference.
+def _row_getter(panel):
+    """Devuelve una función que lee {símbolo: valor} de una fila del panel"""
+    values = panel.to_numpy()
+    positions = {c: j for j, c in enumerate(panel.columns)}
+    def get(symbols, r):
+        return {s: values[r, positions[s]] for s in symbols if s in positions}
+    return get
+
+def _ranked(scores, symbols, k, finite=False, mask=None):
+    """Devuelve una función que da, para la fila ``r``, los ``k`` mejores ``symbols`` de ``scores``.
+
+    El orden es el de ``sorted(..., reverse=True)`` sobre ``symbols`` (en los
+    empates, el primero de la lista); la selección de todas las filas se hace
+    de una vez con :func:`taa.ranking.top_k`. ``mask`` (booleano, mismas
+    columnas) descarta entradas como si no existieran.
+    """
+    present = [s for s in symbols if s in scores.columns]
+    values = scores[present].to_numpy(dtype=float)
+    if mask is not None:
+        values = np.where(mask[present].to_numpy(dtype=bool), values, np.nan)
+    index, _ = top_k(values, k, finite=finite)
+    def get(r):
+        return [present[j] for j in index[r] if j >= 0]
+    return get
+
+def _min_len(n):
+    """Marca un motor con las filas de historia que necesita su primera decisión"""
+    def mark(engine):
+        engine.min_len = n
+        return engine
+    return mark
+
+def _features(features):
+    """Almacén de matrices compartido; si no se recibe uno se crea para esta llamada"""
+    return features if features is not None else FeatureStore()
+
+def _signals_from_decisions(df, decide, min_len, lag=1, decisions=False):
+    """Construye la lista de señales (fecha, pesos) a partir de decisiones por fila.
+
+    ``decide(r)`` devuelve los pesos calculados con datos hasta la fila ``r``.
+    La señal fechada en ``df.index[i]`` usa la decisión de la fila ``i - lag``,
+    salvo la última, que usa todos los datos disponibles. Con ``decisions=True``
+    se devuelve una decisión por fila, fechada con el último dato usado.
+    """
+    n = len(df)
+    if decisions:
+        return [(df.index[r], _safe_decide(decide, r)) for r in range(min_len - 1, n)]
+    if n < min_len:
+        return [(df.index[-1] if n > 0 else pd.Timestamp.now(), {})]
+    sig = []
+    for i in range(min_len - 1, n):
+        if i == n - 1:
+            r = n - 1
+        elif i - lag >= min_len - 1:
+            r = i - lag
+        else:
+            continue
+        sig.append((df.index[i], _safe_decide(decide, r)))
+    return sig
+
+def _safe_decide(decide, r):
+    """Decisión de la fila ``r``; sin posición si faltan datos para calcularla"""
+    try:
+        return decide(r)
+    except (KeyError, IndexError, ValueError, ZeroDivisionError):
+        return {}
+
+def shift_decisions(decisions, index, lag=1):
+    """Fecha cada decisión en el periodo en que se aplica (``lag`` filas después)"""
+    if lag == 0:
+        return list(decisions)
+    positions = index.get_indexer([d for d, _ in decisions]) + lag
+    return [(index[p], w) for p, (d, w) in zip(positions, decisions) if p < len(index)]
+
+@_min_len(7)
+def weights_ret_y_corr(df, universe, top_n=6, low_corr_n=3, features=None, decisions=False):
+    """Calcula señales para Retorno y Correlación con modo defensivo"""
+    # Activos defensivos para usar cuando los retornos no son positivos
+    defensive_assets = ["IEF", "BIL"]
+    values = _features(features).values(df)
+    moments = _features(features).moments(df)
+    positions = {c: j for j, c in enumerate(df.columns)}
+    # Filtrar solo los activos del universo disponibles
+    available_universe = [a for a in universe if a in positions]
+    cols = np.array([positions[a] for a in available_universe], dtype=int)
+    # Ventana de 6 meses por fila: primera fila >= monthdelta(fecha, -6), sin salir de df
+    starts = [max(monthdelta(d, -6), df.index[0]) for d in df.index]
+    window_start = df.index.searchsorted(starts, side='left')
+    # Rendimiento de cada ventana y su top N (mismo orden que nlargest: en empates, el primero)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        totreturns = values[:, cols] / values[window_start][:, cols] - 1
+    top_index, _ = top_k(totreturns, top_n)
+
+    def decide(r):
+        lo = window_start[r]
+        if r - lo + 1 < 2 or not available_universe:
+            return {}
+        # 1. Top N por rendimiento (6 meses)
+        totreturn = totreturns[r]
+        top = top_index[r][top_index[r] >= 0]
+
+        # --- Verificación de que los top N son positivos ---
+        if len(top) == top_n and (totreturn[top] > 0).all():
+            top_cols = cols[top]
+            if not moments.finite(top_cols, lo, r):
+                # Huecos en la ventana: cálculo original con pandas
+                return ret_y_corr_weights(df.iloc[:r + 1], universe, top_n, low_corr_n, defensive_assets)
+            # Modo ofensivo: los menos correlacionados entre los top N
+            avg_corr = np.nan_to_num(moments.corr(top_cols, lo, r), nan=0.0).mean(axis=0)
+            selected = top[np.argsort(avg_corr, kind='stable')[:low_corr_n]]
+            if not len(selected):
+                return {}
+            # Pesos iguales para los activos seleccionados
+            weight = 1.0 / len(selected)
+            return {available_universe[i]: weight for i in selected}
+        # Modo defensivo: seleccionar el mejor activo defensivo
+        defensive = [available_universe.index(a) for a in defensive_assets]
+        valid_def = [i for i in defensive if not np.isnan(totreturn[i])]
+        if not valid_def:
+            return {}
+        best_def = max(valid_def, key=lambda i: totreturn[i])
+        return {available_universe[best_def]: 1.0}
+
+    # Necesitamos al menos 6 meses de datos para la ventana de lookback (6 meses + 1 mes actual)
+    return _signals_from_decisions(df, decide, min_len=weights_ret_y_corr.min_len, lag=0, decisions=decisions)
+
+@_min_len(13)
+def weights_daa(df, risky, protect, canary, features=None, decisions=False):
+    """Calcula señales para DAA Keller - LÓGICA CORREGIDA"""
+    features = _features(features)
+    scores = features.scores(df, keller_scores)
+    score = _row_getter(scores)
+    best_protect = _ranked(scores, protect, 1)
+    top_risky = _ranked(scores, risky, 6)
+    def decide(r):
+        can = score(canary, r)
+        n = sum(1 for v in can.values() if v <= 0)
+        top_p = best_protect(r)
+        top_r = top_risky(r)
+        w = {}
+        if n == 2 and top_p:
+            w = {top_p[0]: 1.0}
+        elif n == 1 and top_p and top_r:
+            w = {top_p[0]: 0.5}
+            w.update({t: 0.5/6 for t in top_r})
+        elif top_r:
+            w = {t: 1/6 for t in top_r}
+        return w
+    return _signals_from_decisions(df, decide, min_len=weights_daa.min_len, decisions=decisions)
+
+@_min_len(6)
+def weights_roc4(df, universe, fill, features=None, decisions=False):
+    """Calcula señales para Dual Momentum ROC4 - LÓGICA CORREGIDA"""
+    features = _features(features)
+    base = 1/6
+    scores = features.scores(df, roc4_scores)
+    # Solo los activos con ROC positivo entran en el top 6
+    top_positive = _ranked(scores, universe, 6, mask=scores > 0)
+    best_fill = _ranked(scores, fill, 1)
+    def decide(r):
+        selected = top_positive(r)
+        n_sel = len(selected)
+        weights = {}
+        for s in selected:
+            weights[s] = base
+        best = best_fill(r)
+        if n_sel < 6 and best:
+            extra = (6 - n_sel) * base
+            weights[best[0]] = weights.get(best[0], 0) + extra
+        return weights
+    return _signals_from_decisions(df, decide, min_len=weights_roc4.min_len, decisions=decisions)
+
+@_min_len(7)
+def weights_accel_dual_mom(df, equity, protective, features=None, decisions=False):
+    """Calcula señales para Accelerated Dual Momentum"""
+    features = _features(features)
+    scores = features.scores(df, accel_dual_mom_scores)
+    score = _row_getter(scores)
+    best_equity_of = _ranked(scores, equity, 1)
+    # Rentabilidad de 1 mes de los activos de protección (solo si el precio anterior es positivo)
+    prices = df[[s for s in protective if s in df.columns]]
+    previous = prices.shift(1)
+    protective_mom = (prices / previous - 1).where(previous > 0)
+    protective_score = _row_getter(protective_mom)
+    best_protective_of = _ranked(protective_mom, protective, 1)
+    def decide(r):
+        equity_mom = score(equity, r)
+        best_equity = best_equity_of(r)
+        best_equity_mom = equity_mom[best_equity[0]] if best_equity else 0
+        n = sum(1 for mom in equity_mom.values() if mom <= 0)
+        w = {}
+        if n == 2 and best_equity_mom <= 0:
+            best_protective = best_protective_of(r)
+            if best_protective and protective_score(best_protective, r)[best_protective[0]] != float('-inf'):
+                w = {best_protective[0]: 1.0}
+        else:
+            if best_equity:
+                w = {best_equity[0]: 1.0}
+        return w
+    return _signals_from_decisions(df, decide, min_len=weights_accel_dual_mom.min_len, decisions=decisions)
+
+@_min_len(13)
+def weights_vaa_12(df, risky, safe, features=None, decisions=False):
+    """Calcula señales para VAA-12"""
+    features = _features(features)
+    scores = features.scores(df, keller_scores)
+    score = _row_getter(scores)
+    best_safe_of = _ranked(scores, safe, 1)
+    top_risky_of = _ranked(scores, risky, 5)
+    def decide(r):
+        risky_mom = score(risky, r)
+        n = sum(1 for mom in risky_mom.values() if mom <= 0)
+        best_safe = best_safe_of(r)
+        top_risky = top_risky_of(r)
+        w = {}
+        if n >= 4 and best_safe:
+            w = {best_safe[0]: 1.0}
+        elif n == 3 and best_safe and top_risky:
+            w = {best_safe[0]: 0.75}
+            w.update({t: 0.25/5 for t in top_risky})
+        elif n == 2 and best_safe and top_risky:
+            w = {best_safe[0]: 0.5}
+            w.update({t: 0.5/5 for t in top_risky})
+        elif n == 1 and best_safe and top_risky:
+            w = {best_safe[0]: 0.25}
+            w.update({t: 0.75/5 for t in top_risky})
+        elif n == 0 and top_risky:
+            w = {t: 1.0/5 for t in top_risky}
+        return w
+    return _signals_from_decisions(df, decide, min_len=weights_vaa_12.min_len, decisions=decisions)
+
+@_min_len(13)
+def weights_composite_dual_mom(df, slices, benchmark, features=None, decisions=False):
+    """Calcula señales para Composite Dual Momentum"""
+    features = _features(features)
+    score = _row_getter(features.scores(df, roc_scores, 12))
+    def decide(r):
+        benchmark_roc = score([benchmark], r).get(benchmark, float('-inf'))
+        w = {}
+        for slice_name, assets in slices.items():
+            if len(assets) == 2:
+                asset1, asset2 = assets
+                rocs = score(assets, r)
+                if asset1 in rocs and asset2 in rocs:
+                    roc1 = rocs[asset1]
+                    roc2 = rocs[asset2]
+                    if roc1 >= roc2:
+                        selected_asset = asset1
+                        selected_roc = roc1
+                    else:
+                        selected_asset = asset2
+                        selected_roc = roc2
+                    if selected_roc > benchmark_roc:
+                        w[selected_asset] = 0.25
+        return w
+    return _signals_from_decisions(df, decide, min_len=weights_composite_dual_mom.min_len, decisions=decisions)
+
+@_min_len(4)
+def weights_quint_switching_filtered(df, risky, defensive, features=None, decisions=False):
+    """Calcula señales para Quint Switching Filtered"""
+    features = _features(features)
+    scores = features.scores(df, roc_scores, 3)
+    score = _row_getter(scores)
+    best_risky_of = _ranked(scores, risky, 1)
+    best_defensive_of = _ranked(scores, defensive, 1)
+    def decide(r):
+        risky_roc = score(risky, r)
+        any_risky_negative = any(roc <= 0 for roc in risky_roc.values())
+        w = {}
+        if any_risky_negative:
+            best_defensive = best_defensive_of(r)
+            if best_defensive:
+                w = {best_defensive[0]: 1.0}
+        else:
+            best_risky = best_risky_of(r)
+            if best_risky:
+                w = {best_risky[0]: 1.0}
+        return w
+    return _signals_from_decisions(df, decide, min_len=weights_quint_switching_filtered.min_len, decisions=decisions)
+
+@_min_len(13)
+def weights_baa_aggressive(df, offensive, defensive, canary, features=None, decisions=False):
+    """Calcula señales para BAA Aggressive - LÓGICA CORREGIDA"""
+    features = _features(features)
+    mom = _row_getter(features.scores(df, momentum_13612w_scores))
+    sma_panel = features.scores(df, sma_scores, 12)
+    sma = _row_getter(sma_panel)
+    price = _row_getter(df)
+    # Fuerza relativa frente a la SMA de los defensivos; solo cuentan los que están por encima
+    defensive_present = [s for s in defensive if s in sma_panel.columns]
+    defensive_sma = sma_panel[defensive_present]
+    defensive_price = df[defensive_present]
+    defensive_rs = defensive_price / defensive_sma - 1
+    above_sma = (defensive_sma > 0) & defensive_price.notna() & (defensive_price > 0) & (defensive_rs > 0)
+    rs = _row_getter(defensive_rs)
+    top_defensive = _ranked(defensive_sma, defensive, 3, mask=above_sma)
+    best_offensive_of = _ranked(sma_panel, offensive, 1)
+    def decide(r):
+        canary_mom = mom(canary, r)
+        any_canary_negative = any(m <= 0 for m in canary_mom.values())
+        w = {}
+        if any_canary_negative:
+            sma_bil = sma(['BIL'], r).get('BIL', 0)
+            price_bil = price(['BIL'], r).get('BIL', 0)
+            rs_bil = (price_bil / sma_bil) - 1 if sma_bil > 0 and not pd.isna(price_bil) and price_bil > 0 else float('-inf')
+            top_3_def = top_defensive(r)
+            top_3_rs = rs(top_3_def, r)
+            selected_assets = []
+            if len(top_3_def) > 0:
+                for asset in top_3_def:
+                    rs_asset = top_3_rs[asset]
+                    if rs_asset <= rs_bil:
+                        selected_assets.append('BIL')
+                    else:
+                        selected_assets.append(asset)
+            else:
+                selected_assets = ['BIL']
+            for asset in selected_assets:
+                w[asset] = w.get(asset, 0) + 1/len(selected_assets) if len(selected_assets) > 0 else 0
+        else:
+            best_offensive = best_offensive_of(r)
+            if best_offensive:
+                w = {best_offensive[0]: 1.0}
+        return w
+    return _signals_from_decisions(df, decide, min_len=weights_baa_aggressive.min_len, decisions=decisions)
+
+@_min_len(7)
+def weights_sistema_descorrelacion(df, main, secondary, features=None, decisions=False):
+    """Calcula señales para Sistema Descorrelación"""
+    features = _features(features)
+    scores = features.scores(df, roc_scores, 6)
+    score = _row_getter(scores)
+    top_main = _ranked(scores, main, 2)
+    top_secondary = _ranked(scores, secondary, 2)
+    def decide(r):
+        main_roc = score(main, r)
+        top_2_main_tickers = top_main(r)
+        weights = {}
+        if 'VTI' not in top_2_main_tickers:
+            for ticker in top_2_main_tickers:
+                if main_roc[ticker] > 0:
+                    weights[ticker] = 0.5
+        else:
+            other_main_ticker = next((t for t in top_2_main_tickers if t != 'VTI'), None)
+            secondary_roc = score(secondary, r)
+            if other_main_ticker and main_roc.get(other_main_ticker, float('-inf')) > 0:
+                weights[other_main_ticker] = 0.5
+            for ticker in top_secondary(r):
+                if secondary_roc[ticker] > 0:
+                    weights[ticker] = weights.get(ticker, 0) + 0.25
+        return weights
+    # Esta estrategia fecha cada señal con el último dato usado (sin desfase)
+    return _signals_from_decisions(df, decide, min_len=weights_sistema_descorrelacion.min_len, lag=0, decisions=decisions)
+
+# Nueva función para HAA
+@_min_len(13)
+def weights_haa(df, offensive_universe, canary, cash_proxy_candidates, features=None, decisions=False):
+    """Calcula señales para HAA (Hybrid Adaptive Asset Allocation)"""
+    features = _features(features)
+    scores = features.scores(df, haa_scores)
+    score = _row_getter(scores)
+    # Solo cuentan los momentum finitos
+    best_cash_of = _ranked(scores, cash_proxy_candidates, 1, finite=True)
+    top_offensive = _ranked(scores, offensive_universe, 4, finite=True)
+    def best_cash(r):
+        best = best_cash_of(r)
+        return best[0] if best else None
+    def decide(r):
+        # Etapa 1: Evaluar el canario TIPS
+        if canary and len(canary) > 0:
+            tip_symbol = canary[0] # Asumimos que el primer elemento es TIP
+            # Si no hay datos de TIP, asumimos mercado normal
+            tip_momentum = score([tip_symbol], r).get(tip_symbol, 0)
+        else:
+            tip_momentum = 0 # Fallback
+        w = {}
+        if tip_momentum > 0: # Etapa 2a: Modo Ofensivo
+            # Los 4 con mejor momentum válido (si hay al menos 4)
+            top_4_offensive = top_offensive(r)
+            if len(top_4_offensive) >= 4:
+                offensive_momentum = score(top_4_offensive, r)
+                # Asignar 25% a cada uno si su momentum es positivo, sino ir a efectivo
+                best_cash_proxy = best_cash(r) or 'BIL' # Default
+                for asset in top_4_offensive:
+                    if offensive_momentum[asset] > 0:
+                        w[asset] = w.get(asset, 0) + 0.25
+                    else:
+                        # Si el momentum es negativo, asignar a efectivo
+                        w[best_cash_proxy] = w.get(best_cash_proxy, 0) + 0.25
+            # Si hay menos de 4 activos válidos, se podría manejar de otra forma,
+            # pero por simplicidad dejamos la cartera vacía o con efectivo.
+        else: # Etapa 2b: Modo Defensivo
+            # Asignar 100% al mejor activo entre los candidatos a efectivo
+            # Si no hay proxies de efectivo válidos, asignar a BIL por defecto
+            w[best_cash(r) or 'BIL'] = 1.0
+        return w
+    return _signals_from_decisions(df, decide, min_len=weights_haa.min_len, decisions=decisions)
+
+# ------------- REGISTRO -------------
+STRATEGY_REGISTRY = {}
+
+def _collect_tickers(params):
+    """Tickers mencionados en los parámetros de una estrategia (listas, dicts o cadenas)"""
+    found = []
+    def visit(value):
+        if isinstance(value, str):
+            found.append(value)
+        elif isinstance(value, dict):
+            for v in value.values():
+                visit(v)
+        elif isinstance(value, (list, tuple, set)):
+            for v in value:
+                visit(v)
+    visit(params)
+    return found
+
+def register_strategy(name, params, signals, lag=1, extra_tickers=()):
+    """Registra una estrategia para el runner.
+
+    ``signals(df, **params, features=..., decisions=True)`` debe devolver una
+    decisión por fila. El calentamiento (``warmup``, meses de historia antes
+    de la primera decisión) sale del ``min_len`` con que se marca el motor
+    (:func:`_min_len`), así que no se repite aquí. ``lag`` son los periodos
+    entre la decisión y su aplicación y ``extra_tickers`` cubre activos usados
+    por el motor que no están en ``params``.
+    """
+    STRATEGY_REGISTRY[name] = {
+        "params": params,
+        "signals": signals,
+        "tickers": list(dict.fromkeys(_collect_tickers(params) + list(extra_tickers))),
+        "warmup": signals.min_len - 1,
+        "lag": lag,
+    }
+    return STRATEGY_REGISTRY[name]
+
+register_strategy("DAA KELLER", DAA_KELLER, weights_daa)
+register_strategy("Dual Momentum ROC4", DUAL_ROC4, weights_roc4)
+register_strategy("Accelerated Dual Momentum", ACCEL_DUAL_MOM, weights_accel_dual_mom)
+register_strategy("VAA-12", VAA_12, weights_vaa_12)
+register_strategy("Composite Dual Momentum", COMPOSITE_DUAL_MOM, weights_composite_dual_mom)
+register_strategy("Quint Switching Filtered", QUINT_SWITCHING_FILTERED, weights_quint_switching_filtered)
+register_strategy("BAA Aggressive", BAA_AGGRESSIVE, weights_baa_aggressive, extra_tickers=['BIL'])
+# Sistema Descorrelación y Retorno y Correlación fechan cada señal con el último
+# dato usado, por lo que se aplican sin desfase
+register_strategy("Sistema Descorrelación", SISTEMA_DESCORRELACION, weights_sistema_descorrelacion, lag=0)
+register_strategy("HAA", HAA, weights_haa, extra_tickers=['BIL'])
+register_strategy("Retorno y Correlación", RET_Y_CORR, weights_ret_y_corr, lag=0, extra_tickers=['IEF', 'BIL'])
+
+# ------------- RUNNER -------------
+def strategy_tickers(names, always=("SPY",)):
+    """Tickers necesarios para ejecutar las estrategias indicadas (más el benchmark)"""
+    tickers = []
+    for name in names:
+        tickers.extend(STRATEGY_REGISTRY[name]["tickers"])
+    return list(dict.fromkeys(tickers + list(always)))
+
+def history_start(start_date, names):
+    """Inicio de la descarga que cubre exactamente el calentamiento de las estrategias"""
+    months = max((STRATEGY_REGISTRY[n]["warmup"] + STRATEGY_REGISTRY[n]["lag"] for n in names), default=0)
+    return (pd.Timestamp(start_date) - pd.DateOffset(months=months)).replace(day=1)
+
+def run_strategy(name, df, features=None):
+    """Decisiones por fila de una estrategia registrada"""
+    spec = STRATEGY_REGISTRY[name]
+    return spec["signals"](df, **spec["params"], features=features, decisions=True)
@@ -0,0 +1,51 @@
+"""Calendario de sesiones de la bolsa de Nueva York (NYSE)."""
+import pandas as pd
+from pandas.tseries.holiday import (AbstractHolidayCalendar, GoodFriday, Holiday, USLaborDay,
+                                    USMartinLutherKingJr, USMemorialDay, USPresidentsDay,
+                                    USThanksgivingDay, nearest_workday)
+from pandas.tseries.offsets import CustomBusinessDay
+
+MARKET_TZ = "America/New_York"
+# Hora a la que damos por publicados los precios de cierre (cierre 16:00 + margen)
+DATA_READY = pd.Timedelta(hours=17)
+
+
+class NYSEHolidayCalendar(AbstractHolidayCalendar):
+    """Festivos de la NYSE"""
+    rules = [
+        Holiday("NewYearsDay", month=1, day=1, observance=nearest_workday),
+        USMartinLutherKingJr,
+        USPresidentsDay,
+        GoodFriday,
+        USMemorialDay,
+        Holiday("Juneteenth", month=6, day=19, start_date="2022-01-01", observance=nearest_workday),
+        Holiday("USIndependenceDay", month=7, day=4, observance=nearest_workday),
+        USLaborDay,
+        USThanksgivingDay,
+        Holiday("Christmas", month=12, day=25, observance=nearest_workday),
+    ]
+
+
+SESSION = CustomBusinessDay(calendar=NYSEHolidayCalendar())
+
+
+def is_session(day):
+    """``True`` si ``day`` es día de mercado"""
+    day = pd.Timestamp(day).normalize()
+    return SESSION.is_on_offset(day)
+
+
+def next_data_ready(ts):
+    """Primer instante posterior a ``ts`` en que se publica un nuevo cierre diario (en UTC).
+
+    ``ts`` es un instante en UTC (timestamp o segundos epoch); las cachés de
+    precios pueden darse por frescas hasta ese momento.
+    """
+    ts = pd.Timestamp(ts, unit="s", tz="UTC") if isinstance(ts, (int, float)) else pd.Timestamp(ts)
+    if ts.tzinfo is None:
+        ts = ts.tz_localize("UTC")
+    local = ts.tz_convert(MARKET_TZ)
+    day = local.tz_localize(None).normalize()
+    if not is_session(day) or local.tz_localize(None) >= day + DATA_READY:
+        day = SESSION.rollforward(day + pd.Timedelta(days=1))
+    return (day + DATA_READY).tz_localize(MARKET_TZ).tz_convert("UTC")
@@ -0,0 +1,35 @@
+"""Caché de precios por intervalos."""
+import pandas as pd
+
+from taa.cache import IntervalCache
+
+
+def _rows(start, periods, value):
+    return pd.DataFrame({"SPY": float(value)}, index=pd.bdate_range(start, periods=periods))
+
+
+def test_entries_are_dropped_when_the_source_version_changes(tmp_path):
+    version = ["v1"]
+    cache = IntervalCache(str(tmp_path), clock=lambda: 0.0, version=lambda: version[0])
+    cache.extend("SPY", _rows("2024-01-01", 20, 100), "2024-01-01", "2024-01-26")
+    assert cache.missing("SPY", "2024-01-01", "2024-01-26") == []
+
+    # Redescarga con otra base de ajuste: la entrada antigua no se reutiliza ni se empalma
+    version[0] = "v2"
+    assert cache.missing("SPY", "2024-01-01", "2024-01-26") == [(pd.Timestamp("2024-01-01"),
+                                                                 pd.Timestamp("2024-01-26"))]
+    cache.extend("SPY", _rows("2024-01-22", 10, 50), "2024-01-22", "2024-02-02")
+    data = cache.get("SPY", "2024-01-22", "2024-02-02")
+    assert (data["SPY"] == 50).all()
+    assert cache.get("SPY", "2024-01-01", "2024-02-02") is None
+
+
+def test_tail_expires_with_the_injected_clock(tmp_path):
+    now = [pd.Timestamp("2024-01-26 12:00", tz="UTC").timestamp()]
+    cache = IntervalCache(str(tmp_path), clock=lambda: now[0])
+    cache.extend("SPY", _rows("2024-01-01", 19, 100), "2024-01-01", "2024-01-26")
+    assert cache.missing("SPY", "2024-01-01", "2024-01-26") == []
+    # Tras el cierre siguiente, el final vuelve al último dato guardado (25 de enero)
+    now[0] = pd.Timestamp("2024-01-27 12:00", tz="UTC").timestamp()
+    assert cache.missing("SPY", "2024-01-01", "2024-01-26") == [(pd.Timestamp("2024-01-26"),
+                                                                 pd.Timestamp("2024-01-26"))]
@@ -0,0 +1,26 @@
+"""Panel del almacén local en ``PriceLoader``."""
+import pandas as pd
+
+from taa.data import PriceLoader
+from taa.store import store_path, write_price_store
+
+
+def _prices(columns, value):
+    return pd.DataFrame({c: float(value) for c in columns}, index=pd.bdate_range("2024-01-01", periods=30))
+
+
+def test_panel_is_rebuilt_when_the_store_changes(tmp_path):
+    data_dir, cache_dir = tmp_path / "data", tmp_path / "cache"
+    data_dir.mkdir()
+    loader = PriceLoader(cache_dir=str(cache_dir), data_dir=str(data_dir), fmp_keys=[])
+    assert loader.panel().empty
+
+    write_price_store(_prices(["SPY"], 100), store_path(str(data_dir)))
+    first = loader.panel()
+    assert list(first.columns) == ["SPY"]
+    assert loader.panel() is first
+
+    write_price_store(_prices(["SPY", "TLT"], 50), store_path(str(data_dir)))
+    second = loader.panel()
+    assert list(second.columns) == ["SPY", "TLT"]
+    assert (second["TLT"] == 50).all()
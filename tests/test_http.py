@@ -0,0 +1,109 @@
+"""Sesión HTTP compartida contra un servidor local de pruebas."""
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlsplit, urlunsplit
+
+import pytest
+from requests.adapters import HTTPAdapter
+
+from taa.http import build_session
+
+requests_cache = pytest.importorskip("requests_cache")
+
+ETAG = '"v1"'
+LAST_MODIFIED = "Wed, 01 Jan 2025 00:00:00 GMT"
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    """``/csv``: ETag + 304 condicional; ``/flaky``: 503 las primeras ``server.failures`` veces"""
+
+    def do_GET(self):
+        server = self.server
+        server.seen.append((self.path, dict(self.headers)))
+        path = urlsplit(self.path).path
+        if path == "/flaky" and server.failures > 0:
+            server.failures -= 1
+            return self._send(503, b"")
+        if path == "/csv" and self.headers.get("If-None-Match") == ETAG:
+            return self._send(304, b"")
+        self._send(200, b"Date,Price\n2025-01-02,100.0\n")
+
+    def _send(self, status, body):
+        self.send_response(status)
+        self.send_header("ETag", ETAG)
+        self.send_header("Last-Modified", LAST_MODIFIED)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def server():
+    httpd = ThreadingHTTPServer(("127.0.0.1", 0), StubHandler)
+    httpd.seen, httpd.failures = [], 0
+    thread = threading.Thread(target=httpd.serve_forever, daemon=True)
+    thread.start()
+    httpd.url = f"http://127.0.0.1:{httpd.server_address[1]}"
+    yield httpd
+    httpd.shutdown()
+    httpd.server_close()
+
+
+@pytest.fixture
+def session(tmp_path):
+    session = build_session(str(tmp_path / "http_cache"), backoff=0)
+    yield session
+    session.close()
+
+
+def test_revalidates_with_validators_and_serves_cached_body_on_304(server, session):
+    first = session.get(f"{server.url}/csv")
+    second = session.get(f"{server.url}/csv")
+    assert first.status_code == second.status_code == 200
+    assert second.from_cache
+    assert second.content == first.content
+    _, headers = server.seen[-1]
+    assert headers.get("If-None-Match") == ETAG
+    assert headers.get("If-Modified-Since") == LAST_MODIFIED
+
+
+def test_retries_503_until_success(server, session):
+    server.failures = 2
+    response = session.get(f"{server.url}/flaky")
+    assert response.status_code == 200
+    assert [p for p, _ in server.seen] == ["/flaky"] * 3
+
+
+def test_apikey_is_not_part_of_the_cache_key(server, session):
+    session.get(f"{server.url}/csv?from=2025-01-01&apikey=one")
+    second = session.get(f"{server.url}/csv?from=2025-01-01&apikey=two")
+    assert second.from_cache
+    assert len(session.cache.responses) == 1
+
+
+class RedirectToStub(HTTPAdapter):
+    """Envía al servidor local las peticiones a FMP, conservando la URL original en la caché"""
+
+    def __init__(self, target, **kwargs):
+        super().__init__(**kwargs)
+        self.target = urlsplit(target)
+
+    def send(self, request, **kwargs):
+        parts = urlsplit(request.url)
+        request.url = urlunsplit(("http", self.target.netloc, parts.path, parts.query, ""))
+        return super().send(request, **kwargs)
+
+
+def test_fmp_responses_are_never_stored(server, session):
+    session.mount("https://financialmodelingprep.com", RedirectToStub(server.url))
+    url = "https://financialmodelingprep.com/csv?from=2025-01-01&to=2025-02-01&apikey=k"
+    first = session.get(url)
+    second = session.get(url)
+    assert first.status_code == second.status_code == 200
+    assert not second.from_cache
+    assert len(session.cache.responses) == 0
+    # Sin entrada guardada no hay validadores que reenviar
+    assert all("If-None-Match" not in headers for _, headers in server.seen)
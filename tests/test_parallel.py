@@ -0,0 +1,67 @@
+"""Recuperación del pool de estrategias cuando muere un worker."""
+import os
+import sys
+
+import pytest
+
+from taa import parallel
+from taa.snapshot import read_snapshot
+from taa.strategies import STRATEGY_REGISTRY, register_strategy
+
+pytestmark = pytest.mark.skipif(sys.platform == "win32", reason="usa fork")
+
+
+def _crash(df, features=None, decisions=True):
+    os._exit(1)
+_crash.min_len = 1
+
+
+@pytest.fixture
+def crash_strategy():
+    # Con fork los workers heredan el registro con la estrategia que se cae
+    register_strategy("Crash", {}, _crash)
+    yield "Crash"
+    STRATEGY_REGISTRY.pop("Crash")
+
+
+@pytest.fixture(scope="module")
+def prices():
+    snapshot = read_snapshot()
+    if snapshot is None:
+        pytest.skip("sin data/snapshot")
+    return snapshot["prices"]
+
+
+def test_broken_pool_is_shut_down_and_panel_removed(prices, crash_strategy, monkeypatch):
+    directories = []
+    mkdtemp = parallel.tempfile.mkdtemp
+
+    def track(*args, **kwargs):
+        directories.append(mkdtemp(*args, **kwargs))
+        return directories[-1]
+
+    monkeypatch.setattr(parallel.tempfile, "mkdtemp", track)
+    shutdowns = []
+    shutdown = parallel.ProcessPoolExecutor.shutdown
+
+    def record(self, wait=True, *, cancel_futures=False):
+        shutdowns.append((wait, cancel_futures))
+        return shutdown(self, wait, cancel_futures=cancel_futures)
+
+    monkeypatch.setattr(parallel.ProcessPoolExecutor, "shutdown", record)
+    pool = parallel.StrategyPool(workers=2, mp_context="fork")
+    try:
+        it = pool.imap([crash_strategy, "DAA KELLER"], prices)
+        name, decisions, error = next(it)
+        assert isinstance(error, parallel.BrokenProcessPool)
+        assert pool._executor is None
+        assert shutdowns == [(False, True)]
+        assert not os.path.exists(directories[0])
+        list(it)
+
+        # El siguiente uso arranca un pool nuevo
+        out = pool.evaluate(["DAA KELLER", "HAA"], prices)
+        assert set(out) == {"DAA KELLER", "HAA"}
+        assert pool._executor is not None
+    finally:
+        pool.close()
@@ -0,0 +1,72 @@
+"""Regresión de la contabilidad vectorizada frente al bucle original por filas."""
+import pandas as pd
+import pytest
+
+from taa.backtest import run_signals
+from taa.portfolio import equity_curves
+from taa.snapshot import read_snapshot
+
+CAPITAL = 100_000
+
+
+def _reference_curve(returns, dates, weights_at, initial_capital):
+    """Bucle del dashboard original: un periodo por fecha de rebalanceo, fila a fila"""
+    values, index = [initial_capital], [returns.index[0]]
+    first, after_last = returns.index[0], returns.index[-1] + pd.DateOffset(days=1)
+    for i, date in enumerate(dates):
+        start = max(date, first)
+        end = min(dates[i + 1] if i + 1 < len(dates) else after_last, after_last)
+        weights = weights_at(start)
+        for day, row in returns[(returns.index >= start) & (returns.index < end)].iterrows():
+            ret = sum(w * row[t] for t, w in weights.items() if t in row.index and not pd.isna(row[t]))
+            values.append(values[-1] * (1 + ret))
+            index.append(day)
+    ser = pd.Series(values, index=index)
+    return ser[~ser.index.duplicated(keep='last')].sort_index()
+
+
+def _reference(returns, signals, active, initial_capital):
+    """Combinada (pesos vigentes de todas, a partes iguales) e individuales (pesos exactos)"""
+    def combined_at(date):
+        out = {}
+        for s in active:
+            exact = dict(signals[s]).get(date)
+            if not exact:
+                exact = next((w for d, w in reversed(signals[s]) if d <= date), {})
+            for t, w in exact.items():
+                out[t] = out.get(t, 0) + w / len(active)
+        return out
+    combined = _reference_curve(returns, [d for d, _ in signals[active[0]]], combined_at, initial_capital)
+    individual = {s: _reference_curve(returns, [d for d, _ in signals[s]],
+                                      lambda date, s=s: dict(signals[s]).get(date, {}), initial_capital)
+                  for s in active if signals[s]}
+    return combined, individual
+
+
+@pytest.fixture(scope="module")
+def prices():
+    snapshot = read_snapshot()
+    if snapshot is None:
+        pytest.skip("sin data/snapshot")
+    return snapshot["prices"]
+
+
+@pytest.mark.parametrize("active", [
+    ["DAA KELLER"],
+    ["HAA", "VAA-12", "Sistema Descorrelación"],
+    ["Retorno y Correlación", "Dual Momentum ROC4", "BAA Aggressive", "Composite Dual Momentum"],
+])
+@pytest.mark.parametrize("start", ["2005-01-01", "2016-07-15"])
+def test_equity_curves_match_row_loop(prices, active, start):
+    end = prices.index[-1]
+    history = run_signals(prices, active, start, end)["history"]
+    signals = {s: list(history[s]) for s in active}
+    returns = prices[prices.index >= pd.Timestamp(start)].pct_change().fillna(0)
+
+    combined, individual = equity_curves(returns, history, active, CAPITAL)
+    ref_combined, ref_individual = _reference(returns, signals, active, CAPITAL)
+
+    pd.testing.assert_series_equal(combined, ref_combined, rtol=1e-12, check_freq=False)
+    assert individual.keys() == ref_individual.keys()
+    for s in individual:
+        pd.testing.assert_series_equal(individual[s], ref_individual[s], rtol=1e-12, check_freq=False)
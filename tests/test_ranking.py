@@ -0,0 +1,102 @@
+"""Selección vectorizada de los mejores activos (``top_k``) frente a ``sorted``."""
+import numpy as np
+import pandas as pd
+import pytest
+
+from taa.features import FeatureStore
+from taa.momentum import keller_scores
+from taa.ranking import top_k
+from taa.strategies import DAA_KELLER, _ranked, run_strategy
+
+
+def _reference(row, k, finite=False):
+    """Selección del código original: ``sorted(..., reverse=True)`` sobre las columnas válidas"""
+    valid = [j for j, v in enumerate(row) if (np.isfinite(v) if finite else not np.isnan(v))]
+    best = sorted(valid, key=lambda j: row[j], reverse=True)[:k]
+    return best + [-1] * (min(k, len(row)) - len(best))
+
+
+def _scores(rng, shape):
+    # Puntuaciones enteras pequeñas: muchos empates
+    return rng.integers(-3, 4, shape).astype(float)
+
+
+@pytest.mark.parametrize("k", [1, 3, 6, 12])
+def test_matches_sorted_on_nan_free_scores(k):
+    scores = _scores(np.random.default_rng(k), (200, 12))
+    index, weights = top_k(scores, k)
+    assert index.tolist() == [_reference(row, k) for row in scores]
+    assert np.allclose(weights.sum(axis=1), 1.0)
+
+
+@pytest.mark.parametrize("finite", [False, True])
+def test_nan_is_never_selected(finite):
+    rng = np.random.default_rng(7)
+    scores = _scores(rng, (200, 8))
+    scores[rng.random(scores.shape) < 0.3] = np.nan
+    scores[rng.random(scores.shape) < 0.05] = np.inf
+    index, weights = top_k(scores, 4, finite=finite)
+    assert index.tolist() == [_reference(row, 4, finite) for row in scores]
+    assert not weights[np.isnan(scores)].any()
+    assert weights[np.isinf(scores)].any() != finite
+
+
+def test_explicit_row():
+    row = np.array([[np.nan, 3.0, np.inf, 3.0, -np.inf]])
+    assert top_k(row, 3)[0].tolist() == [[2, 1, 3]]
+    assert top_k(row, 3, finite=True)[0].tolist() == [[1, 3, -1]]
+
+
+def test_ranked_masks_and_skips_absent_symbols():
+    scores = pd.DataFrame({"A": [1.0, 5.0, np.nan], "B": [2.0, -1.0, 3.0], "C": [2.0, 4.0, 1.0]})
+    top = _ranked(scores, ["C", "B", "Z", "A"], 2, mask=scores > 0)
+    # Empate en la fila 0: gana el primero de la lista (C); B no cuenta en la fila 1 por la máscara
+    assert [top(r) for r in range(3)] == [["C", "B"], ["A", "C"], ["B", "C"]]
+
+
+def _panel(rng, tickers, n=80):
+    returns = rng.normal(0.005, 0.04, (n, len(tickers)))
+    index = pd.date_range("2010-01-31", periods=n, freq="ME")
+    return pd.DataFrame(100 * np.cumprod(1 + returns, axis=0), index=index, columns=tickers)
+
+
+def test_daa_never_picks_a_ticker_without_score():
+    tickers = list(dict.fromkeys(DAA_KELLER["risky"] + DAA_KELLER["protect"] + DAA_KELLER["canary"]))
+    panel = _panel(np.random.default_rng(3), tickers)
+    panel.iloc[30:40, panel.columns.get_loc("QQQ")] = np.nan
+    masked = keller_scores(panel, FeatureStore())["QQQ"].isna()
+    assert masked.any()
+
+    decisions = dict(run_strategy("DAA KELLER", panel))
+    for date, weights in decisions.items():
+        if masked[date]:
+            assert "QQQ" not in weights
+    # Con datos, QQQ sí entra en alguna decisión
+    assert any("QQQ" in w for d, w in decisions.items() if not masked[d])
+
+
+def _reference_daa(scores, risky, protect, canary):
+    """Decisión de DAA con la selección original por ``sorted`` sobre la fila de puntuaciones"""
+    def top(row, symbols, k):
+        return sorted(symbols, key=lambda s: row[s], reverse=True)[:k]
+    out = []
+    for date, row in scores.iterrows():
+        n = sum(1 for s in canary if row[s] <= 0)
+        top_p, top_r = top(row, protect, 1), top(row, risky, 6)
+        if n == 2:
+            w = {top_p[0]: 1.0}
+        elif n == 1:
+            w = {top_p[0]: 0.5}
+            w.update({t: 0.5 / 6 for t in top_r})
+        else:
+            w = {t: 1 / 6 for t in top_r}
+        out.append((date, w))
+    return out
+
+
+def test_daa_unchanged_on_nan_free_panel():
+    tickers = list(dict.fromkeys(DAA_KELLER["risky"] + DAA_KELLER["protect"] + DAA_KELLER["canary"]))
+    panel = _panel(np.random.default_rng(5), tickers)
+    scores = keller_scores(panel, FeatureStore())
+    expected = _reference_daa(scores.iloc[12:], **DAA_KELLER)
+    assert run_strategy("DAA KELLER", panel) == expected
@@ -0,0 +1,68 @@
+"""Cuotas por API key con reloj falso."""
+import pytest
+
+from taa.ratelimit import KeyQuota
+
+
+class FakeClock:
+    """Reloj de pared falso; ``sleep`` avanza el tiempo y registra las esperas"""
+
+    def __init__(self, now=1_000_000.0):
+        self.now = now
+        self.sleeps = []
+
+    def __call__(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.sleeps.append(seconds)
+        self.now += seconds
+
+
+@pytest.fixture
+def clock():
+    return FakeClock()
+
+
+def _quota(path, clock, keys=("k1",), per_minute=2, per_day=5, max_wait=120.0):
+    return KeyQuota(keys, per_minute, per_day, str(path), clock=clock, sleep=clock.sleep, max_wait=max_wait)
+
+
+def test_minute_bucket_refills(tmp_path, clock):
+    quota = _quota(tmp_path / "q.sqlite", clock)
+    assert quota.acquire() == "k1"
+    assert quota.acquire() == "k1"
+    assert quota.remaining()["k1"]["minute"] == 0
+    # Sin token por minuto: espera lo justo para el siguiente (2 por minuto = 30 s)
+    assert quota.acquire() == "k1"
+    assert clock.sleeps == [pytest.approx(30.0)]
+    clock.now += 60
+    assert quota.remaining()["k1"]["minute"] == 2
+
+
+def test_day_bucket_refills(tmp_path, clock):
+    quota = _quota(tmp_path / "q.sqlite", clock, per_minute=100, per_day=2, max_wait=10)
+    assert [quota.acquire(), quota.acquire()] == ["k1", "k1"]
+    assert quota.remaining()["k1"]["day"] == 0
+    clock.now += 86400 / 2
+    assert quota.remaining()["k1"]["day"] == 1
+    assert quota.acquire() == "k1"
+
+
+def test_acquire_gives_up_beyond_max_wait(tmp_path, clock):
+    quota = _quota(tmp_path / "q.sqlite", clock, per_minute=100, per_day=1, max_wait=60)
+    assert quota.acquire() == "k1"
+    # El siguiente token diario tarda un día: más que max_wait, sin dormir
+    assert quota.acquire() is None
+    assert clock.sleeps == []
+
+
+def test_instances_share_budget(tmp_path, clock):
+    path = tmp_path / "q.sqlite"
+    first = _quota(path, clock, keys=("k1", "k2"), per_minute=1, per_day=10, max_wait=1)
+    second = _quota(path, clock, keys=("k1", "k2"), per_minute=1, per_day=10, max_wait=1)
+    assert {first.acquire(), second.acquire()} == {"k1", "k2"}
+    # Las dos keys ya gastaron su minuto, vistas desde cualquiera de las instancias
+    assert first.acquire() is None
+    assert second.acquire() is None
+    assert first.remaining() == second.remaining()
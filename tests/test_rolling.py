@@ -0,0 +1,30 @@
+"""Correlaciones móviles por sumas acumuladas frente a ``DataFrame.corr``."""
+import numpy as np
+import pandas as pd
+
+from taa.rolling import RollingMoments
+
+
+def _prices(returns):
+    return 100 * np.cumprod(1 + np.vstack([np.zeros(returns.shape[1]), returns]), axis=0)
+
+
+def test_corr_matches_pandas_with_large_mean_and_small_spread():
+    rng = np.random.default_rng(0)
+    # Rentabilidades con media grande frente a su dispersión: sin centrar, la
+    # resta de sumas de cuadrados cancela casi todos los dígitos
+    returns = 0.3 + rng.normal(0, 1e-6, (120, 3))
+    prices = _prices(returns)
+    moments = RollingMoments(prices)
+    for lo, hi in [(0, 12), (40, 64), (100, 120)]:
+        expected = pd.DataFrame(prices[lo:hi + 1]).pct_change().dropna().corr().to_numpy()
+        np.testing.assert_allclose(moments.corr([0, 1, 2], lo, hi), expected, atol=1e-6)
+
+
+def test_constant_returns_have_no_correlation():
+    rng = np.random.default_rng(1)
+    returns = np.column_stack([rng.normal(0.01, 0.05, 60), np.full(60, 0.004), np.zeros(60)])
+    moments = RollingMoments(_prices(returns))
+    out = moments.corr([0, 1, 2], 10, 40)
+    assert out[0, 0] == 1.0
+    assert np.isnan(out[1]).all() and np.isnan(out[2]).all()
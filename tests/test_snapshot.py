@@ -0,0 +1,33 @@
+"""Escritura atómica del snapshot."""
+import os
+
+import pandas as pd
+import pytest
+
+from taa.snapshot import read_snapshot, snapshot_stamp, write_snapshot
+
+
+@pytest.fixture(scope="module")
+def snapshot():
+    snapshot = read_snapshot()
+    if snapshot is None:
+        pytest.skip("sin data/snapshot")
+    return snapshot
+
+
+def test_write_roundtrip_leaves_no_temporaries(tmp_path, snapshot):
+    directory = str(tmp_path / "snapshot")
+    assert snapshot_stamp(directory) is None
+    write_snapshot(snapshot, directory)
+    stamp = snapshot_stamp(directory)
+    assert stamp is not None
+    assert not [f for f in os.listdir(directory) if f.endswith(".tmp")]
+
+    copy = read_snapshot(directory)
+    assert copy["manifest"] == snapshot["manifest"]
+    pd.testing.assert_frame_equal(copy["prices"], snapshot["prices"])
+    assert copy["decisions"] == snapshot["decisions"]
+
+    # Un snapshot nuevo cambia la marca del manifiesto (la clave de la caché del dashboard)
+    write_snapshot(dict(snapshot, manifest=dict(snapshot["manifest"], note="x" * 10)), directory)
+    assert snapshot_stamp(directory) != stamp
@@ -0,0 +1,96 @@
+"""Actualización incremental de los CSV con una fuente local (sin red)."""
+import os
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import update_csv
+from taa.store import DATA_DIR, csv_path, read_bars_csv, read_price_store, store_path, write_price_store
+
+ROWS, KEPT = 60, 45
+
+
+def _bars(ticker):
+    path = csv_path(ticker, DATA_DIR)
+    if not os.path.exists(path):
+        pytest.skip(f"sin {path}")
+    with open(path, encoding="utf-8") as f:
+        return read_bars_csv(f.read()).iloc[-ROWS:]
+
+
+def _write(directory, ticker, bars):
+    with open(csv_path(ticker, directory), "w", encoding="utf-8") as f:
+        f.write(update_csv.csv_header(ticker) + update_csv.csv_rows(bars))
+
+
+def _read(directory, ticker):
+    with open(csv_path(ticker, directory), encoding="utf-8") as f:
+        return f.read()
+
+
+@pytest.fixture
+def dirs(tmp_path):
+    """``local`` con los CSV recortados y ``remote`` con lo que devolvería la fuente"""
+    local, remote = tmp_path / "data", tmp_path / "remote"
+    local.mkdir()
+    remote.mkdir()
+    bars = {t: _bars(t) for t in ("SPY", "QQQ", "GLD")}
+    # SPY: solo hay barras nuevas; QQQ: la fuente ha reajustado toda la historia; GLD: sin cambios
+    _write(remote, "SPY", bars["SPY"])
+    readjusted = bars["QQQ"].copy()
+    readjusted["Price"] *= 1 + 1e-5
+    _write(remote, "QQQ", readjusted)
+    _write(remote, "GLD", bars["GLD"].iloc[:KEPT])
+    for t in bars:
+        _write(local, t, bars[t].iloc[:KEPT])
+    write_price_store(pd.DataFrame({t: b["Price"].iloc[:KEPT] for t, b in bars.items()}), store_path(str(local)))
+    return str(local), str(remote)
+
+
+def test_appends_when_overlap_matches(dirs):
+    local, remote = dirs
+    before = _read(local, "SPY")
+    status, prices = update_csv.update_ticker("SPY", update_csv.csv_source(remote), local)
+    assert status == f"+{ROWS - KEPT} filas"
+    after = _read(local, "SPY")
+    # Solo se añaden filas al final, y el resultado es el fichero de la fuente
+    assert after.startswith(before)
+    assert after == _read(remote, "SPY")
+    assert len(prices) == ROWS
+
+
+def test_redownloads_when_overlap_differs(dirs):
+    local, remote = dirs
+    status, prices = update_csv.update_ticker("QQQ", update_csv.csv_source(remote), local)
+    assert status.startswith("historia reajustada")
+    assert _read(local, "QQQ") == _read(remote, "QQQ")
+    np.testing.assert_array_equal(prices.to_numpy(), read_bars_csv(_read(remote, "QQQ"))["Price"].to_numpy())
+
+
+def test_overlap_within_tolerance_is_not_a_readjustment(dirs):
+    local, remote = dirs
+    bars = read_bars_csv(_read(remote, "SPY"))
+    bars["Price"] *= 1 + 1e-8
+    _write(remote, "SPY", bars)
+    status, _ = update_csv.update_ticker("SPY", update_csv.csv_source(remote), local)
+    assert status == f"+{ROWS - KEPT} filas"
+
+
+def test_store_rewrites_only_changed_tickers(dirs, monkeypatch):
+    local, remote = dirs
+    written = []
+
+    def spy_write(prices, path=None):
+        written.append(sorted(prices.columns))
+        return write_price_store(prices, path)
+
+    monkeypatch.setattr(update_csv, "write_price_store", spy_write)
+    gld_before = read_price_store(store_path(local))["GLD"].dropna()
+    results = update_csv.update_all(["SPY", "QQQ", "GLD"], update_csv.csv_source(remote), local, workers=2)
+
+    assert results["GLD"] == "sin cambios"
+    assert written == [["QQQ", "SPY"]]
+    store = read_price_store(store_path(local))
+    pd.testing.assert_series_equal(store["GLD"].dropna(), gld_before)
+    assert store["SPY"].dropna().index[-1] == read_bars_csv(_read(remote, "SPY")).index[-1]
@@ -1,8 +1,35 @@
-import yfinance as yf
+"""Actualiza los CSV de ``data/`` y el almacén Parquet con los precios diarios de Yahoo Finance.
+
+La actualización es incremental: de cada CSV se lee su última fecha, se piden
+solo las sesiones posteriores (más unos días de solape) y se añaden al final
+del fichero. Los ficheros sin barras nuevas no se tocan. Si el solape no
+coincide con lo guardado, Yahoo ha reajustado la historia (dividendo o split)
+y ese ticker se vuelve a descargar entero.
+
+Uso::
+
+    python update_csv.py                     # incremental, todos los tickers
+    python update_csv.py --full SPY QQQ      # historia completa de algunos tickers
+    python update_csv.py --source-dir otra/  # fuente local (CSV) en lugar de Yahoo
+
+La fuente de datos es cualquier función ``source(ticker, start)`` que devuelva
+un DataFrame con las columnas ``COLUMNS`` indexado por fecha (``start=None``
+pide la historia completa); ``update_all`` la recibe como parámetro, así que
+se puede sustituir por una fuente falsa para probar sin red.
+"""
+import argparse
 import os
-import pandas as pd
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from datetime import datetime
 
+import numpy as np
+import pandas as pd
+
+from taa.store import (BAR_COLUMNS as COLUMNS, csv_path, read_bars_csv, read_price_csv,
+                       read_price_store, store_path, write_price_store)
+
 # Lista de tickers
 TICKERS = [
     "SPY","QQQ","IWM","EFA","EEM","VNQ","DBC","GLD","TLT","IYR",
@@ -11,36 +38,153 @@ TICKERS = [
 
 # Carpeta data directamente en la raíz del repo
 DATA_DIR = "data"
-os.makedirs(DATA_DIR, exist_ok=True)
 
-for ticker in TICKERS:
-    print(f"⬇️ Descargando {ticker} ...")
-    df = yf.download(ticker, start="1980-01-01", auto_adjust=False)
+HISTORY_START = "1980-01-01"
+# Días naturales ya guardados que se vuelven a pedir para detectar reajustes
+OVERLAP_DAYS = 10
+RETRIES = 3
+WORKERS = 8
+
 
+def yahoo_source(ticker, start=None):
+    """Barras diarias de Yahoo Finance desde ``start`` (historia completa si es ``None``)"""
+    import yfinance as yf
+
+    # Ticker.history no comparte estado entre hilos (yf.download sí)
+    df = yf.Ticker(ticker).history(start=start or HISTORY_START, auto_adjust=False, actions=False)
     if df.empty:
-        print(f"⚠️ No hay datos para {ticker}")
-        continue
-
-    # Reordenar y renombrar columnas al formato de tus CSV
-    df = df.rename(
-        columns={
-            "Adj Close": "Price",
-            "Close": "Close",
-            "High": "High",
-            "Low": "Low",
-            "Open": "Open",
-            "Volume": "Volume",
-        }
-    )[["Price", "Close", "High", "Low", "Open", "Volume"]]
-
-    # Añadir fila con tickers como en tu CSV original
-    header_df = pd.DataFrame([[ticker]*len(df.columns)], columns=df.columns, index=["Ticker"])
-    empty_row = pd.DataFrame([[""]*len(df.columns)], columns=df.columns, index=["Date"])
-    df_out = pd.concat([header_df, empty_row, df])
-
-    # Guardar en CSV
-    file_path = os.path.join(DATA_DIR, f"{ticker}.csv")
-    df_out.to_csv(file_path, index=True)
-    print(f"✅ Guardado {file_path} ({len(df)} filas)")
-
-print("📈 Actualización completada:", datetime.now())
+        return pd.DataFrame(columns=COLUMNS)
+    df.index = df.index.tz_localize(None).normalize()
+    return df.rename(columns={"Adj Close": "Price"})[COLUMNS]
+
+
+def csv_source(directory):
+    """Fuente local: lee las barras de los CSV de ``directory`` (mismo formato que ``data/``)"""
+    def source(ticker, start=None):
+        path = csv_path(ticker, directory)
+        if not os.path.exists(path):
+            return pd.DataFrame(columns=COLUMNS)
+        with open(path, encoding="utf-8") as f:
+            bars = read_bars_csv(f.read())
+        return bars[bars.index >= pd.Timestamp(start)] if start is not None else bars
+    return source
+
+
+def csv_header(ticker):
+    """Las cuatro filas de cabecera de los CSV"""
+    tickers = ",".join([ticker] * len(COLUMNS))
+    return (f"Price,{','.join(COLUMNS)}\n"
+            f"Ticker,{tickers}\nTicker,{tickers}\n"
+            f"Date{',' * len(COLUMNS)}\n")
+
+
+def csv_rows(bars):
+    """Filas de datos en el formato de los CSV"""
+    return bars[COLUMNS].to_csv(header=False, date_format="%Y-%m-%d %H:%M:%S", lineterminator="\n")
+
+
+def fetch(source, ticker, start, retries=RETRIES, backoff=2.0, sleep=time.sleep):
+    """Llama a ``source`` reintentando con backoff exponencial"""
+    for attempt in range(retries):
+        try:
+            return source(ticker, start)
+        except Exception as e:
+            if attempt == retries - 1:
+                raise
+            print(f"🔁 {ticker}: {e} (reintento {attempt + 1}/{retries - 1})")
+            sleep(backoff * 2 ** attempt)
+
+
+def update_ticker(ticker, source, data_dir=DATA_DIR, full=False):
+    """Actualiza el CSV de ``ticker``.
+
+    Devuelve ``(estado, precios)``: ``precios`` es la serie ajustada completa si
+    el fichero ha cambiado y ``None`` si no.
+    """
+    path = csv_path(ticker, data_dir)
+    stored = None
+    text = ""
+    if not full and os.path.exists(path):
+        with open(path, encoding="utf-8") as f:
+            text = f.read()
+        stored = read_price_csv(text, ticker)
+        stored = stored[ticker] if not stored.empty else None
+
+    if stored is not None:
+        last = stored.index[-1]
+        bars = fetch(source, ticker, last - pd.Timedelta(days=OVERLAP_DAYS))
+        common = stored.index.intersection(bars.index[bars.index <= last])
+        if len(common) and np.allclose(bars.loc[common, "Price"].astype(float), stored.loc[common],
+                                       rtol=1e-6, atol=0, equal_nan=True):
+            new = bars[bars.index > last]
+            if new.empty:
+                return "sin cambios", None
+            with open(path, "a", encoding="utf-8") as f:
+                f.write(("" if text.endswith("\n") else "\n") + csv_rows(new))
+            return f"+{len(new)} filas", pd.concat([stored, new["Price"].astype(float)])
+        status = "historia reajustada"
+    else:
+        status = "historia completa"
+
+    bars = fetch(source, ticker, None)
+    if bars.empty:
+        return "sin datos", None
+    with open(path, "w", encoding="utf-8") as f:
+        f.write(csv_header(ticker) + csv_rows(bars))
+    return f"{status} ({len(bars)} filas)", bars["Price"].astype(float)
+
+
+def update_all(tickers=TICKERS, source=yahoo_source, data_dir=DATA_DIR, full=False, workers=WORKERS):
+    """Actualiza en paralelo los CSV de ``tickers`` y el almacén Parquet.
+
+    Devuelve ``{ticker: estado}``; los tickers que fallan tras los reintentos
+    quedan como ``"error: ..."`` sin interrumpir al resto.
+    """
+    os.makedirs(data_dir, exist_ok=True)
+    results, changed = {}, {}
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        futures = {executor.submit(update_ticker, t, source, data_dir, full): t for t in tickers}
+        for future in as_completed(futures):
+            ticker = futures[future]
+            try:
+                status, prices = future.result()
+            except Exception as e:
+                status, prices = f"error: {e}", None
+            results[ticker] = status
+            print(f"{'⚠️' if status.startswith('error') else '✅'} {ticker}: {status}")
+            if prices is not None:
+                changed[ticker] = prices
+
+    # Tickers que aún no están en el almacén aunque su CSV no haya cambiado
+    path = store_path(data_dir)
+    in_store = set(read_price_store(path).columns)
+    for ticker in tickers:
+        if ticker not in changed and ticker not in in_store and os.path.exists(csv_path(ticker, data_dir)):
+            with open(csv_path(ticker, data_dir), encoding="utf-8") as f:
+                prices = read_price_csv(f.read(), ticker)
+            if not prices.empty:
+                changed[ticker] = prices[ticker]
+
+    if changed:
+        write_price_store(pd.DataFrame(changed), path)
+        print(f"🗄️ Almacén de precios actualizado: {path} ({', '.join(sorted(changed))})")
+    return results
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Actualiza los CSV de precios y el almacén Parquet")
+    parser.add_argument("tickers", nargs="*", default=TICKERS)
+    parser.add_argument("--full", action="store_true", help="descarga la historia completa")
+    parser.add_argument("--workers", type=int, default=WORKERS)
+    parser.add_argument("--data-dir", default=DATA_DIR)
+    parser.add_argument("--source-dir", help="lee las barras de los CSV de este directorio en lugar de Yahoo")
+    args = parser.parse_args(argv)
+
+    source = csv_source(args.source_dir) if args.source_dir else yahoo_source
+    results = update_all(args.tickers, source, args.data_dir, args.full, args.workers)
+    print("📈 Actualización completada:", datetime.now())
+    return 1 if results and all(s.startswith("error") for s in results.values()) else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())